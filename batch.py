@@ -0,0 +1,262 @@
+"""Offline batch question generation for a whole directory of syllabi.
+
+    python batch.py CATALOG_DIR [-o OUTPUT_DIR] [--workers N]
+
+Every PDF/TXT under CATALOG_DIR goes through the same pipeline as Tab 2
+(extraction with OCR fallback, clean_text, generate_questions_from_text) in a
+process pool. Each file's questions and stage timings are written to
+OUTPUT_DIR/results/, and a line is appended to OUTPUT_DIR/manifest.jsonl as
+soon as it finishes. Re-running the command skips files whose content hash
+already has a successful manifest entry, so an interrupted run resumes where
+it stopped. A timing summary goes to OUTPUT_DIR/summary.json.
+
+Memory stays bounded: only a few files are queued per worker at a time,
+workers are recycled after --max-tasks-per-child files, and results are
+written by the workers rather than sent back to the parent. Each worker
+OCRs with --ocr-threads tesseract threads (default 1), so the machine runs
+at most workers x ocr-threads tesseract processes.
+
+If a worker process dies (out of memory, or a crash in native pdfium or
+tesseract code) the files it had in flight are recorded as errors, a new
+pool is started and the run continues; re-running retries them.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import syllabus
+import uploads
+
+SUFFIXES = (".pdf", ".txt")
+STAGES = ("extract", "clean", "generate", "write")
+
+
+def file_digest(path, chunk_size=uploads.CHUNK_SIZE):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_syllabi(root):
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(SUFFIXES):
+                found.append(os.path.join(dirpath, name))
+    return found
+
+
+def load_done(manifest_path):
+    """Content hashes that already have a successful result."""
+    done = set()
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                if entry.get("status") == "ok":
+                    done.add(entry["hash"])
+    except OSError:
+        pass
+    return done
+
+
+def _init_worker(ocr_threads):
+    # the pool already uses every core; don't multiply tesseract processes per worker
+    syllabus.OCR_WORKERS = ocr_threads
+
+
+def _failed_entry(path, digest, error):
+    return {"path": path, "hash": digest, "status": "error", "error": error, "seconds": 0.0, "stages": {}}
+
+
+def process_file(path, digest, results_dir, ocr=True, max_mb=uploads.MAX_UPLOAD_MB, max_pages=uploads.MAX_PDF_PAGES):
+    """Run one syllabus through the pipeline; runs inside a worker process."""
+    timings = {}
+    entry = {"path": path, "hash": digest, "status": "ok"}
+    started = time.perf_counter()
+    try:
+        size = os.path.getsize(path)
+        if size > max_mb * 1024 * 1024:
+            raise uploads.UploadRejected(f"File is {size / 1048576:.1f} MB; the limit is {max_mb} MB.")
+
+        t = time.perf_counter()
+        pages = []
+        if path.lower().endswith(".pdf"):
+            pages = syllabus.extract_pdf_pages(path, ocr=ocr, max_pages=max_pages)
+            text = " ".join(p.text for p in pages if p.text)
+        else:
+            text = uploads.read_text_file(path)
+        timings["extract"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        text = syllabus.clean_text(text)
+        timings["clean"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        # seeded by content so re-runs produce the same questions
+        questions = syllabus.generate_questions_from_text(text, rng=random.Random(digest))
+        timings["generate"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output = os.path.join(results_dir, f"{stem}-{digest[:12]}.json")
+        result = {
+            "path": path,
+            "hash": digest,
+            "characters": len(text),
+            "pages": [
+                {"page": p.number, "method": p.method, "characters": len(p.text), "seconds": round(p.seconds, 4)}
+                for p in pages
+            ],
+            "questions": questions,
+        }
+        tmp = f"{output}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, output)
+        timings["write"] = time.perf_counter() - t
+
+        entry["output"] = output
+        entry["pages"] = len(pages)
+        entry["ocr_pages"] = sum(1 for p in pages if p.method in ("ocr", "ocr-cache"))
+        entry["questions"] = sum(len(qs) for qs in questions.values())
+    except Exception as e:  # one bad file must not stop the catalog
+        entry["status"] = "error"
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["seconds"] = round(time.perf_counter() - started, 4)
+    entry["stages"] = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+    return entry
+
+
+def summarize(entries, skipped, wall_seconds):
+    ok = [e for e in entries if e["status"] == "ok"]
+    per_file = sorted(e["seconds"] for e in ok)
+    stages = {stage: round(sum(e["stages"].get(stage, 0.0) for e in ok), 4) for stage in STAGES}
+    return {
+        "processed": len(ok),
+        "failed": len(entries) - len(ok),
+        "skipped": skipped,
+        "wall_seconds": round(wall_seconds, 3),
+        "stage_seconds": stages,
+        "file_seconds": {
+            "mean": round(sum(per_file) / len(per_file), 4) if per_file else 0.0,
+            "median": per_file[len(per_file) // 2] if per_file else 0.0,
+            "max": per_file[-1] if per_file else 0.0,
+        },
+        "failures": [{"path": e["path"], "error": e["error"]} for e in entries if e["status"] != "ok"],
+    }
+
+
+def run(catalog_dir, output_dir, workers=None, ocr=True, max_mb=uploads.MAX_UPLOAD_MB,
+        max_pages=uploads.MAX_PDF_PAGES, max_tasks_per_child=50, ocr_threads=1, log=print):
+    results_dir = os.path.join(output_dir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, "manifest.jsonl")
+    done = load_done(manifest_path)
+
+    started = time.perf_counter()
+    files = find_syllabi(catalog_dir)
+    todo, skipped = [], 0
+    for path in files:
+        digest = file_digest(path)
+        if digest in done:
+            skipped += 1
+        else:
+            done.add(digest)  # identical copies in the catalog are processed once
+            todo.append((path, digest))
+    log(f"{len(files)} file(s) found, {skipped} already processed or duplicate, {len(todo)} to go")
+
+    workers = workers or os.cpu_count() or 1
+    entries = []
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child,
+                                   initializer=_init_worker, initargs=(ocr_threads,))
+
+    with open(manifest_path, "a", encoding="utf-8") as manifest:
+        def record(entry):
+            entries.append(entry)
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+            status = "ok" if entry["status"] == "ok" else entry["error"]
+            log(f"[{len(entries)}/{len(todo)}] {entry['path']} ({entry['seconds']:.2f}s) {status}")
+
+        pool = new_pool()
+        try:
+            pending = {}  # future -> (path, digest)
+            queue = iter(todo)
+            while True:
+                # keep at most two files in flight per worker
+                for path, digest in queue:
+                    future = pool.submit(process_file, path, digest, results_dir, ocr, max_mb, max_pages)
+                    pending[future] = (path, digest)
+                    if len(pending) >= workers * 2:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                broken = None
+                for future in finished:
+                    path, digest = pending.pop(future)
+                    try:
+                        record(future.result())
+                    except BrokenProcessPool as e:
+                        broken = f"BrokenProcessPool: a worker process died ({e})"
+                        record(_failed_entry(path, digest, broken))
+                if broken:
+                    # every file still in the dead pool is lost with it
+                    for path, digest in pending.values():
+                        record(_failed_entry(path, digest, broken))
+                    pending.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    log("A worker process died; starting a new pool.")
+                    pool = new_pool()
+        finally:
+            pool.shutdown()
+
+    summary = summarize(entries, skipped, time.perf_counter() - started)
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate questions for every syllabus PDF/TXT in a directory.")
+    parser.add_argument("catalog_dir", help="directory searched recursively for .pdf and .txt files")
+    parser.add_argument("-o", "--output-dir", default="batch_output", help="where results, manifest and summary go")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-ocr", action="store_true", help="skip OCR of scanned pages")
+    parser.add_argument("--max-mb", type=int, default=uploads.MAX_UPLOAD_MB, help="skip files larger than this")
+    parser.add_argument("--max-pages", type=int, default=uploads.MAX_PDF_PAGES, help="skip PDFs with more pages")
+    parser.add_argument("--max-tasks-per-child", type=int, default=50,
+                        help="recycle each worker after this many files to cap memory growth")
+    parser.add_argument("--ocr-threads", type=int, default=1,
+                        help="tesseract threads per worker (total OCR processes = workers x this)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.catalog_dir):
+        parser.error(f"{args.catalog_dir} is not a directory")
+
+    summary = run(args.catalog_dir, args.output_dir, workers=args.workers, ocr=not args.no_ocr,
+                  max_mb=args.max_mb, max_pages=args.max_pages, max_tasks_per_child=args.max_tasks_per_child,
+                  ocr_threads=args.ocr_threads)
+    stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in summary["stage_seconds"].items())
+    print(f"Done: {summary['processed']} processed, {summary['failed']} failed, {summary['skipped']} skipped "
+          f"in {summary['wall_seconds']:.1f}s ({stages})")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Benchmark the quiz checkpoint overhead per interaction.
+
+    python bench_session_store.py [--sessions N] [--questions Q] [--threads T] [--store URL ...]
+
+Simulates N quiz sessions of Q questions against each store: every session
+starts a quiz, answers each question once (one checkpoint per answer),
+submits, and is then restored as if the browser reconnected to another
+replica. Reports per-operation latency percentiles, and the size of the
+compact checkpoint next to the pickled session_state it stands in for.
+"""
+import argparse
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import session_store
+
+
+def make_bank(size=200, options=4):
+    return {
+        f"physics/Easy/{i}": {
+            "id": f"physics/Easy/{i}",
+            "q": f"Sample question number {i} about laws of motion and energy?",
+            "options": [f"Option {k} for question {i}" for k in range(options)],
+            "ans": f"Option 0 for question {i}",
+            "topic": "Laws of Motion",
+        }
+        for i in range(size)
+    }
+
+
+def run_session(store, sid, bank, questions, rng):
+    """One quiz lifecycle; returns {op: [seconds]}."""
+    timings = {"start": [], "answer": [], "submit": [], "restore": []}
+    checkpoint = session_store.QuizCheckpoint(store, sid)
+    quiz = rng.sample(list(bank.values()), questions)
+    params = {"subject": "physics", "difficulty": "Easy", "num": questions}
+
+    t = time.perf_counter()
+    checkpoint.start(params, quiz, 0, extra={"student": "bench"})
+    timings["start"].append(time.perf_counter() - t)
+    for i, q in enumerate(quiz):
+        t = time.perf_counter()
+        checkpoint.answer(i, rng.randrange(len(q["options"])))
+        timings["answer"].append(time.perf_counter() - t)
+    t = time.perf_counter()
+    checkpoint.submit()
+    timings["submit"].append(time.perf_counter() - t)
+    t = time.perf_counter()
+    restored = checkpoint.restore(bank)
+    timings["restore"].append(time.perf_counter() - t)
+    assert restored and restored["submitted"] and None not in restored["answers"].values()
+    return timings
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def bench(url, sessions, questions, threads, bank):
+    store = session_store.open_store(url)
+    timings = {"start": [], "answer": [], "submit": [], "restore": []}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(run_session, store, f"bench{n:032x}"[-32:], bank, questions, random.Random(n))
+                   for n in range(sessions)]
+        for future in futures:
+            for op, values in future.result().items():
+                timings[op].extend(values)
+    wall = time.perf_counter() - started
+    interactions = sum(len(v) for v in timings.values())
+    print(f"\n{url}  ({sessions} sessions x {questions} answers, {threads} thread(s), "
+          f"{interactions / wall:,.0f} checkpoints/s)")
+    print(f"  {'op':<8} {'count':>7} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'max µs':>9}")
+    for op, values in timings.items():
+        values.sort()
+        print(f"  {op:<8} {len(values):>7} " + " ".join(
+            f"{percentile(values, p) * 1e6:>9.1f}" for p in (50, 95, 99)) + f" {values[-1] * 1e6:>9.1f}")
+    for n in range(sessions):
+        store.delete(f"bench{n:032x}"[-32:])
+
+
+def payload_sizes(bank, questions):
+    rng = random.Random(0)
+    quiz = rng.sample(list(bank.values()), questions)
+    answers = {i: q["options"][rng.randrange(len(q["options"]))] for i, q in enumerate(quiz)}
+    memory = session_store.MemorySessionStore()
+    checkpoint = session_store.QuizCheckpoint(memory, "size")
+    checkpoint.start({"subject": "physics", "difficulty": "Easy", "num": questions}, quiz, 0, extra={"student": "bench"})
+    start_bytes = sum(len(k) + len(v.encode("utf-8")) for k, v in memory.get("size").items())
+    for i, q in enumerate(quiz):
+        checkpoint.answer(i, q["options"].index(answers[i]))
+    answer_bytes = (sum(len(k) + len(v.encode("utf-8")) for k, v in memory.get("size").items()) - start_bytes) / questions
+    state = {"quiz3": quiz, "answers3": answers, "submitted3": False,
+             "quiz_params": {"subject": "physics", "difficulty": "Easy", "num": questions},
+             **{f"marker_q{i}": a for i, a in answers.items()}, **{f"quiz3_q{i}": a for i, a in answers.items()}}
+    full = len(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+    print(f"checkpoint size: start {start_bytes} B, {answer_bytes:.1f} B per answer; "
+          f"whole quiz session_state pickled: {full} B")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure quiz checkpoint overhead per interaction.")
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=1, help="concurrent sessions")
+    parser.add_argument("--store", action="append",
+                        help="store URL(s) to compare (default: memory:// and a temporary SQLite file)")
+    args = parser.parse_args(argv)
+
+    bank = make_bank(max(200, args.questions))
+    payload_sizes(bank, args.questions)
+    with tempfile.TemporaryDirectory() as tmp:
+        urls = args.store or ["memory://", "sqlite:///" + os.path.join(tmp, "sessions.sqlite3")]
+        for url in urls:
+            bench(url, args.sessions, args.questions, args.threads, bank)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,24 @@ import datetime
 import random
 import re
 import pandas as pd
-from PyPDF2 import PdfReader
+from PyPDF2.errors import PdfReadError
 from fpdf import FPDF
+import hashlib
+import hmac
 import io
+import os
 import time
+import uuid
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
+import profiling
+import syllabus
+import uploads
+import topic_index
+import revision
+import search_index
+import taxonomy
+import session_store
 
 def clean_question_text(text):
     if not text:
@@ -40,13 +52,9 @@ def clean_question_text(text):
 # Set A: Original AI Study Assistant 
 # ---------------------------
 
-# ✅ Allowed subjects list
-VALID_SUBJECTS = [
-    "maths", "mathematics", "physics", "chemistry", "biology",
-    "english", "hindi", "sociology", "history", "geography",
-    "computer", "science", "accountancy", "economics", "business studies",
-    "python","computer science","c","c++","operating system","dbms"
-]
+# ✅ One subject taxonomy (names, aliases, sub-topics) shared by every tab
+TAXONOMY = taxonomy.default_taxonomy()
+VALID_SUBJECTS = TAXONOMY.names()
 
 def format_time(hours_float):
     """Format study time into hours/mins cleanly."""
@@ -60,7 +68,9 @@ def format_time(hours_float):
     else:
         return f"{minutes} mins"
 
-def generate_study_plan(subjects, exam_date, daily_hours):
+def generate_study_plan(subjects, exam_date, daily_hours, revision_topics=None):
+    """revision_topics: optional {date: [topic labels]} of due revision items;
+    anything due before the first plan day is put on day 1."""
     today = datetime.date.today()
     days_left = (exam_date - today).days
     if days_left <= 0:
@@ -76,6 +86,10 @@ def generate_study_plan(subjects, exam_date, daily_hours):
         for subject, difficulty in subjects:
             allocated_time = (daily_hours * weights[difficulty]) / total_weight
             daily_plan[subject] = format_time(allocated_time)
+        if revision_topics is not None:
+            date = today + datetime.timedelta(days=day)
+            due = {t for d, topics in revision_topics.items() if d == date or (day == 1 and d < date) for t in topics}
+            daily_plan["Revision"] = ", ".join(sorted(due)) or "-"
         plan.append(daily_plan)
 
     return plan
@@ -84,12 +98,10 @@ def generate_study_plan(subjects, exam_date, daily_hours):
 def extract_text_from_pdf(uploaded_file):
     text = ""
     try:
-        pdf_reader = PdfReader(uploaded_file)
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + " "
-    except:
+        for page in syllabus.extract_pdf_pages(uploaded_file):
+            if page.text:
+                text += page.text + " "
+    except PdfReadError:
         text = "⚠ Could not extract text from PDF"
     return text
 
@@ -128,7 +140,9 @@ def export_plan_to_pdf(plan):
         pdf.cell(200, 8, f"Day: {day_plan['Day']}", ln=True)
         for subj, time in day_plan.items():
             if subj != "Day":
-                pdf.cell(200, 8, f" {subj}: {time}", ln=True)
+                # revision topics may be in Hindi; the core fonts are latin-1 only
+                line = f" {subj}: {time}".encode("latin-1", "replace").decode("latin-1")
+                pdf.cell(200, 8, line, ln=True)
         pdf.ln(4)
 
     return pdf.output(dest="S").encode("latin-1")
@@ -185,175 +199,175 @@ def export_questions_to_pdf(questions):
 QUESTION_BANK = {
     "mathematics": {
         "Easy": [
-            {"q":"What is 7 + 5?","options":["11","12","13","10"],"ans":"12"},
-            {"q":"What is the square root of 64?","options":["6","8","7","9"],"ans":"8"},
-            {"q":"What is 5 * 4?","options":["20","15","25","10"],"ans":"20"},
-            {"q":"What is 10 - 3?","options":["8","6","7","3"],"ans":"7"},
-            {"q":"What is 9 + 1?","options":["9","10","11","8"],"ans":"10"},
-            {"q":"What is 2 + 2?","options":["3","4","2","5"],"ans":"4"},
+            {"q":"What is 7 + 5?","options":["11","12","13","10"],"ans":"12","topic":"Addition"},
+            {"q":"What is the square root of 64?","options":["6","8","7","9"],"ans":"8","topic":"Square Roots"},
+            {"q":"What is 5 * 4?","options":["20","15","25","10"],"ans":"20","topic":"Multiplication"},
+            {"q":"What is 10 - 3?","options":["8","6","7","3"],"ans":"7","topic":"Subtraction"},
+            {"q":"What is 9 + 1?","options":["9","10","11","8"],"ans":"10","topic":"Addition"},
+            {"q":"What is 2 + 2?","options":["3","4","2","5"],"ans":"4","topic":"Addition"},
         ],
         "Medium": [
-            {"q":"If 3x + 6 = 15, what is x?","options":["2","3","4","1"],"ans":"3"},
-            {"q":"What is the formula for area of a triangle?","options":["(base*height)/2","base*height","2*(base+height)","base+height"],"ans":"(base*height)/2"},
-            {"q":"What is the solution to x^2 = 16?","options":["±4","4 only","-4 only","0"],"ans":"±4"},
-            {"q":"What is 12/3?","options":["4","3","6","2"],"ans":"4"},
-            {"q":"What is the next prime after 7?","options":["11","9","13","10"],"ans":"11"},
-            {"q":"If f(x)=x^2, what is f(3)?","options":["9","6","3","12"],"ans":"9"},
+            {"q":"If 3x + 6 = 15, what is x?","options":["2","3","4","1"],"ans":"3","topic":"Linear Equations"},
+            {"q":"What is the formula for area of a triangle?","options":["(base*height)/2","base*height","2*(base+height)","base+height"],"ans":"(base*height)/2","topic":"Mensuration"},
+            {"q":"What is the solution to x^2 = 16?","options":["±4","4 only","-4 only","0"],"ans":"±4","topic":"Quadratic Equations"},
+            {"q":"What is 12/3?","options":["4","3","6","2"],"ans":"4","topic":"Division"},
+            {"q":"What is the next prime after 7?","options":["11","9","13","10"],"ans":"11","topic":"Prime Numbers"},
+            {"q":"If f(x)=x^2, what is f(3)?","options":["9","6","3","12"],"ans":"9","topic":"Functions"},
         ],
         "Hard": [
-            {"q":"Derivative of x^3 is:","options":["3x^2","x^2","x^3","3x"],"ans":"3x^2"},
-            {"q":"Integral of 2x dx is:","options":["x^2 + C","2x + C","x + C","x^3/3 + C"],"ans":"x^2 + C"},
-            {"q":"If matrix A is [[1,0],[0,1]] what is determinant?","options":["1","0","2","-1"],"ans":"1"},
-            {"q":"What is the quadratic formula root expression?","options":["(-b ± √(b^2-4ac))/(2a)","(b ± √(...))/2a","-b/(2a)","..."],"ans":"(-b ± √(b^2-4ac))/(2a)"},
-            {"q":"What is limit of (1+1/n)^n as n→∞?","options":["e","1","0","∞"],"ans":"e"},
-            {"q":"Which theorem relates to right-angled triangles?","options":["Pythagorean Theorem","Fermat's Last Theorem","Mean Value Theorem","Bayes Theorem"],"ans":"Pythagorean Theorem"},
+            {"q":"Derivative of x^3 is:","options":["3x^2","x^2","x^3","3x"],"ans":"3x^2","topic":"Differentiation"},
+            {"q":"Integral of 2x dx is:","options":["x^2 + C","2x + C","x + C","x^3/3 + C"],"ans":"x^2 + C","topic":"Integration"},
+            {"q":"If matrix A is [[1,0],[0,1]] what is determinant?","options":["1","0","2","-1"],"ans":"1","topic":"Matrices and Determinants"},
+            {"q":"What is the quadratic formula root expression?","options":["(-b ± √(b^2-4ac))/(2a)","(b ± √(...))/2a","-b/(2a)","..."],"ans":"(-b ± √(b^2-4ac))/(2a)","topic":"Quadratic Equations"},
+            {"q":"What is limit of (1+1/n)^n as n→∞?","options":["e","1","0","∞"],"ans":"e","topic":"Limits"},
+            {"q":"Which theorem relates to right-angled triangles?","options":["Pythagorean Theorem","Fermat's Last Theorem","Mean Value Theorem","Bayes Theorem"],"ans":"Pythagorean Theorem","topic":"Pythagorean Theorem"},
         ],
     },
 
     "physics": {
         "Easy":[
-            {"q":"Which force pulls objects toward Earth?","options":["Gravity","Friction","Magnetism","Electricity"],"ans":"Gravity"},
-            {"q":"Unit of force is:","options":["Newton","Joule","Watt","Pascal"],"ans":"Newton"},
-            {"q":"Light travels fastest in:","options":["Vacuum","Water","Glass","Air"],"ans":"Vacuum"},
-            {"q":"Which instrument measures temperature?","options":["Thermometer","Barometer","Ammeter","Voltmeter"],"ans":"Thermometer"},
+            {"q":"Which force pulls objects toward Earth?","options":["Gravity","Friction","Magnetism","Electricity"],"ans":"Gravity","topic":"Gravitation"},
+            {"q":"Unit of force is:","options":["Newton","Joule","Watt","Pascal"],"ans":"Newton","topic":"Units and Measurement"},
+            {"q":"Light travels fastest in:","options":["Vacuum","Water","Glass","Air"],"ans":"Vacuum","topic":"Light"},
+            {"q":"Which instrument measures temperature?","options":["Thermometer","Barometer","Ammeter","Voltmeter"],"ans":"Thermometer","topic":"Heat and Temperature"},
         ],
         "Medium":[
-            {"q":"Who formulated laws of motion?","options":["Newton","Einstein","Galileo","Tesla"],"ans":"Newton"},
-            {"q":"SI unit of energy is:","options":["Joule","Watt","Newton","Pascal"],"ans":"Joule"},
-            {"q":"Ohm's law relates voltage, current and:","options":["Resistance","Power","Energy","Charge"],"ans":"Resistance"},
-            {"q":"What is speed = distance/time measured in?","options":["m/s","m^2","N","s"],"ans":"m/s"},
+            {"q":"Who formulated laws of motion?","options":["Newton","Einstein","Galileo","Tesla"],"ans":"Newton","topic":"Laws of Motion"},
+            {"q":"SI unit of energy is:","options":["Joule","Watt","Newton","Pascal"],"ans":"Joule","topic":"Work and Energy"},
+            {"q":"Ohm's law relates voltage, current and:","options":["Resistance","Power","Energy","Charge"],"ans":"Resistance","topic":"Electricity"},
+            {"q":"What is speed = distance/time measured in?","options":["m/s","m^2","N","s"],"ans":"m/s","topic":"Motion"},
         ],
         "Hard":[
-            {"q":"Einstein is famous for which relation?","options":["E = mc^2","F = ma","V = IR","pV = nRT"],"ans":"E = mc^2"},
-            {"q":"What is the phenomenon of bending of light?","options":["Refraction","Reflection","Diffraction","Interference"],"ans":"Refraction"},
-            {"q":"What is work if force and displacement are perpendicular?","options":["0","Positive","Negative","Undefined"],"ans":"0"},
-            {"q":"What is the SI unit of pressure?","options":["Pascal","Bar","atm","mmHg"],"ans":"Pascal"},
+            {"q":"Einstein is famous for which relation?","options":["E = mc^2","F = ma","V = IR","pV = nRT"],"ans":"E = mc^2","topic":"Modern Physics"},
+            {"q":"What is the phenomenon of bending of light?","options":["Refraction","Reflection","Diffraction","Interference"],"ans":"Refraction","topic":"Light"},
+            {"q":"What is work if force and displacement are perpendicular?","options":["0","Positive","Negative","Undefined"],"ans":"0","topic":"Work and Energy"},
+            {"q":"What is the SI unit of pressure?","options":["Pascal","Bar","atm","mmHg"],"ans":"Pascal","topic":"Pressure"},
         ],
     },
 
     "chemistry": {
         "Easy":[
-            {"q":"Water's chemical formula is:","options":["H2O","CO2","O2","H2"],"ans":"H2O"},
-            {"q":"pH of neutral water approx is:","options":["7","0","14","1"],"ans":"7"},
-            {"q":"What is table salt chemically?","options":["Sodium Chloride","Potassium Chloride","Sodium Hydroxide","Hydrochloric Acid"],"ans":"Sodium Chloride"},
-            {"q":"Which gas is produced in photosynthesis?","options":["Oxygen","Carbon Dioxide","Nitrogen","Hydrogen"],"ans":"Oxygen"},
+            {"q":"Water's chemical formula is:","options":["H2O","CO2","O2","H2"],"ans":"H2O","topic":"Chemical Formulae"},
+            {"q":"pH of neutral water approx is:","options":["7","0","14","1"],"ans":"7","topic":"Acids, Bases and pH"},
+            {"q":"What is table salt chemically?","options":["Sodium Chloride","Potassium Chloride","Sodium Hydroxide","Hydrochloric Acid"],"ans":"Sodium Chloride","topic":"Chemical Compounds"},
+            {"q":"Which gas is produced in photosynthesis?","options":["Oxygen","Carbon Dioxide","Nitrogen","Hydrogen"],"ans":"Oxygen","topic":"Photosynthesis"},
         ],
         "Medium":[
-            {"q":"Atomic number represents:","options":["Number of protons","Number of neutrons","Mass number","Valence electrons"],"ans":"Number of protons"},
-            {"q":"pH less than 7 indicates:","options":["Acidic","Basic","Neutral","Salt"],"ans":"Acidic"},
-            {"q":"Which bond shares electrons?","options":["Covalent","Ionic","Hydrogen","Metallic"],"ans":"Covalent"},
-            {"q":"Period in periodic table is:","options":["Row","Column","Group","Block"],"ans":"Row"},
+            {"q":"Atomic number represents:","options":["Number of protons","Number of neutrons","Mass number","Valence electrons"],"ans":"Number of protons","topic":"Atomic Structure"},
+            {"q":"pH less than 7 indicates:","options":["Acidic","Basic","Neutral","Salt"],"ans":"Acidic","topic":"Acids, Bases and pH"},
+            {"q":"Which bond shares electrons?","options":["Covalent","Ionic","Hydrogen","Metallic"],"ans":"Covalent","topic":"Chemical Bonding"},
+            {"q":"Period in periodic table is:","options":["Row","Column","Group","Block"],"ans":"Row","topic":"Periodic Table"},
         ],
         "Hard":[
-            {"q":"What is Avogadro's number approx?","options":["6.022e23","3.14","9.81","1.6e-19"],"ans":"6.022e23"},
-            {"q":"What type of reaction is combustion?","options":["Redox","Acid-base","Precipitation","Photochemical"],"ans":"Redox"},
-            {"q":"What is the molar mass of CO2 (approx)?","options":["44 g/mol","12 g/mol","28 g/mol","32 g/mol"],"ans":"44 g/mol"},
-            {"q":"Which is a noble gas?","options":["Argon","Oxygen","Nitrogen","Chlorine"],"ans":"Argon"},
+            {"q":"What is Avogadro's number approx?","options":["6.022e23","3.14","9.81","1.6e-19"],"ans":"6.022e23","topic":"Mole Concept"},
+            {"q":"What type of reaction is combustion?","options":["Redox","Acid-base","Precipitation","Photochemical"],"ans":"Redox","topic":"Chemical Reactions"},
+            {"q":"What is the molar mass of CO2 (approx)?","options":["44 g/mol","12 g/mol","28 g/mol","32 g/mol"],"ans":"44 g/mol","topic":"Mole Concept"},
+            {"q":"Which is a noble gas?","options":["Argon","Oxygen","Nitrogen","Chlorine"],"ans":"Argon","topic":"Periodic Table"},
         ],
     },
 
     "biology": {
         "Easy":[
-            {"q":"The basic unit of life is:","options":["Cell","Tissue","Organ","Organism"],"ans":"Cell"},
-            {"q":"Photosynthesis occurs in:","options":["Chloroplast","Mitochondria","Nucleus","Ribosome"],"ans":"Chloroplast"},
-            {"q":"Human blood type that is universal donor:","options":["O-","A+","B+","AB+"],"ans":"O-"},
-            {"q":"Which organ pumps blood?","options":["Heart","Lung","Kidney","Liver"],"ans":"Heart"},
+            {"q":"The basic unit of life is:","options":["Cell","Tissue","Organ","Organism"],"ans":"Cell","topic":"Cell Biology"},
+            {"q":"Photosynthesis occurs in:","options":["Chloroplast","Mitochondria","Nucleus","Ribosome"],"ans":"Chloroplast","topic":"Photosynthesis"},
+            {"q":"Human blood type that is universal donor:","options":["O-","A+","B+","AB+"],"ans":"O-","topic":"Blood and Circulation"},
+            {"q":"Which organ pumps blood?","options":["Heart","Lung","Kidney","Liver"],"ans":"Heart","topic":"Blood and Circulation"},
         ],
         "Medium":[
-            {"q":"Which macromolecule is enzyme?","options":["Protein","Carbohydrate","Lipid","Nucleic acid"],"ans":"Protein"},
-            {"q":"Where does digestion begin?","options":["Mouth","Stomach","Small Intestine","Esophagus"],"ans":"Mouth"},
-            {"q":"DNA stands for:","options":["Deoxyribonucleic Acid","Ribonucleic Acid","Protein","Carbohydrate"],"ans":"Deoxyribonucleic Acid"},
-            {"q":"Which cell organelle makes ATP?","options":["Mitochondria","Ribosome","Golgi","Nucleus"],"ans":"Mitochondria"},
+            {"q":"Which macromolecule is enzyme?","options":["Protein","Carbohydrate","Lipid","Nucleic acid"],"ans":"Protein","topic":"Biomolecules"},
+            {"q":"Where does digestion begin?","options":["Mouth","Stomach","Small Intestine","Esophagus"],"ans":"Mouth","topic":"Digestion"},
+            {"q":"DNA stands for:","options":["Deoxyribonucleic Acid","Ribonucleic Acid","Protein","Carbohydrate"],"ans":"Deoxyribonucleic Acid","topic":"Genetics"},
+            {"q":"Which cell organelle makes ATP?","options":["Mitochondria","Ribosome","Golgi","Nucleus"],"ans":"Mitochondria","topic":"Cell Biology"},
         ],
         "Hard":[
-            {"q":"What is Mendel known for?","options":["Genetics","Evolution","Cell theory","Germ theory"],"ans":"Genetics"},
-            {"q":"What carries genetic info?","options":["DNA","RNA","Protein","Lipid"],"ans":"DNA"},
-            {"q":"What is homeostasis?","options":["Maintaining internal balance","Cell division","Protein synthesis","Digestion"],"ans":"Maintaining internal balance"},
-            {"q":"Which system controls hormones?","options":["Endocrine","Nervous","Digestive","Respiratory"],"ans":"Endocrine"},
+            {"q":"What is Mendel known for?","options":["Genetics","Evolution","Cell theory","Germ theory"],"ans":"Genetics","topic":"Genetics"},
+            {"q":"What carries genetic info?","options":["DNA","RNA","Protein","Lipid"],"ans":"DNA","topic":"Genetics"},
+            {"q":"What is homeostasis?","options":["Maintaining internal balance","Cell division","Protein synthesis","Digestion"],"ans":"Maintaining internal balance","topic":"Homeostasis"},
+            {"q":"Which system controls hormones?","options":["Endocrine","Nervous","Digestive","Respiratory"],"ans":"Endocrine","topic":"Endocrine System"},
         ],
     },
 
     "english": {
         "Easy":[
-            {"q":"A synonym of 'big' is:","options":["Large","Tiny","Short","Narrow"],"ans":"Large"},
-            {"q":"Antonym of 'happy' is:","options":["Sad","Glad","Joyful","Cheerful"],"ans":"Sad"},
-            {"q":"Which is a noun? 'Cat' is:","options":["Noun","Verb","Adjective","Adverb"],"ans":"Noun"},
-            {"q":"Choose the article: '___ apple'","options":["An","A","The","No article"],"ans":"An"},
+            {"q":"A synonym of 'big' is:","options":["Large","Tiny","Short","Narrow"],"ans":"Large","topic":"Vocabulary"},
+            {"q":"Antonym of 'happy' is:","options":["Sad","Glad","Joyful","Cheerful"],"ans":"Sad","topic":"Vocabulary"},
+            {"q":"Which is a noun? 'Cat' is:","options":["Noun","Verb","Adjective","Adverb"],"ans":"Noun","topic":"Parts of Speech"},
+            {"q":"Choose the article: '___ apple'","options":["An","A","The","No article"],"ans":"An","topic":"Articles"},
         ],
         "Medium":[
-            {"q":"Which is past tense of 'go'?","options":["Went","Go","Gone","Going"],"ans":"Went"},
-            {"q":"Identify adjective: 'beautiful'","options":["Adjective","Noun","Verb","Adverb"],"ans":"Adjective"},
-            {"q":"Plural of 'child' is:","options":["Children","Childs","Childes","Child"],"ans":"Children"},
-            {"q":"Which is correct sentence? 'She ___ a book'","options":["reads","readed","reading","rreads"],"ans":"reads"},
+            {"q":"Which is past tense of 'go'?","options":["Went","Go","Gone","Going"],"ans":"Went","topic":"Tenses"},
+            {"q":"Identify adjective: 'beautiful'","options":["Adjective","Noun","Verb","Adverb"],"ans":"Adjective","topic":"Parts of Speech"},
+            {"q":"Plural of 'child' is:","options":["Children","Childs","Childes","Child"],"ans":"Children","topic":"Nouns and Plurals"},
+            {"q":"Which is correct sentence? 'She ___ a book'","options":["reads","readed","reading","rreads"],"ans":"reads","topic":"Subject-Verb Agreement"},
         ],
         "Hard":[
-            {"q":"Choose correct preposition: 'good ___ mathematics'","options":["at","in","on","for"],"ans":"at"},
-            {"q":"What is a conjunction?","options":["And","Run","Blue","Quickly"],"ans":"And"},
-            {"q":"Which is a homophone pair?","options":["to / two","cat / car","red / bed","sun / moon"],"ans":"to / two"},
-            {"q":"What is passive voice of 'She wrote a letter'?","options":["A letter was written by her","She was written a letter","She wrote a letter","She had written a letter"],"ans":"A letter was written by her"},
+            {"q":"Choose correct preposition: 'good ___ mathematics'","options":["at","in","on","for"],"ans":"at","topic":"Prepositions"},
+            {"q":"What is a conjunction?","options":["And","Run","Blue","Quickly"],"ans":"And","topic":"Parts of Speech"},
+            {"q":"Which is a homophone pair?","options":["to / two","cat / car","red / bed","sun / moon"],"ans":"to / two","topic":"Homophones"},
+            {"q":"What is passive voice of 'She wrote a letter'?","options":["A letter was written by her","She was written a letter","She wrote a letter","She had written a letter"],"ans":"A letter was written by her","topic":"Active and Passive Voice"},
         ],
     },
 
     "hindi": {
         "Easy":[
-            {"q":"भारत की राष्ट्रीय भाषा क्या है?","options":["हिंदी","अंग्रेजी","तमिल","उर्दू"],"ans":"हिंदी"},
-            {"q":"'पानी' का पर्यायवाची क्या है?","options":["जल","आग","हवा","पेड़"],"ans":"जल"},
-            {"q":"संज्ञा क्या दर्शाती है?","options":["नाम","क्रिया","विशेषण","क्रिया विशेषण"],"ans":"नाम"},
-            {"q":"'लाल' किस प्रकार का शब्द है?","options":["विशेषण","संज्ञा","क्रिया","सर्वनाम"],"ans":"विशेषण"},
+            {"q":"भारत की राष्ट्रीय भाषा क्या है?","options":["हिंदी","अंग्रेजी","तमिल","उर्दू"],"ans":"हिंदी","topic":"भाषा"},
+            {"q":"'पानी' का पर्यायवाची क्या है?","options":["जल","आग","हवा","पेड़"],"ans":"जल","topic":"पर्यायवाची शब्द"},
+            {"q":"संज्ञा क्या दर्शाती है?","options":["नाम","क्रिया","विशेषण","क्रिया विशेषण"],"ans":"नाम","topic":"संज्ञा"},
+            {"q":"'लाल' किस प्रकार का शब्द है?","options":["विशेषण","संज्ञा","क्रिया","सर्वनाम"],"ans":"विशेषण","topic":"विशेषण"},
         ],
         "Medium":[
-            {"q":"कबीर किसके लिए प्रसिद्ध हैं?","options":["दोहे","नाटक","उपन्यास","कहानी"],"ans":"दोहे"},
-            {"q":"संज्ञा के कितने भेद हैं?","options":["5","3","2","4"],"ans":"5"},
-            {"q":"किसे विलोम कहा जाता है? 'अच्छा' का विलोम है:","options":["बुरा","अच्छा","छोटा","बड़ा"],"ans":"बुरा"},
-            {"q":"कबीर के दोहे में मुख्य विषय क्या है?","options":["भक्ति और समाज सुधार","युद्ध","प्रेम","प्रकृति"],"ans":"भक्ति और समाज सुधार"},
+            {"q":"कबीर किसके लिए प्रसिद्ध हैं?","options":["दोहे","नाटक","उपन्यास","कहानी"],"ans":"दोहे","topic":"कबीर"},
+            {"q":"संज्ञा के कितने भेद हैं?","options":["5","3","2","4"],"ans":"5","topic":"संज्ञा"},
+            {"q":"किसे विलोम कहा जाता है? 'अच्छा' का विलोम है:","options":["बुरा","अच्छा","छोटा","बड़ा"],"ans":"बुरा","topic":"विलोम शब्द"},
+            {"q":"कबीर के दोहे में मुख्य विषय क्या है?","options":["भक्ति और समाज सुधार","युद्ध","प्रेम","प्रकृति"],"ans":"भक्ति और समाज सुधार","topic":"कबीर"},
         ],
         "Hard":[
-            {"q":"रस सिद्धांत के प्रणेता माने जाते हैं:","options":["भरत मुनि","रामानंद","कालिदास","हरिवंश राय"],"ans":"भरत मुनि"},
-            {"q":"'अंधेर नगरी' के लेखक कौन?","options":["भारतेन्दु हरिश्चंद्र","मुंशी प्रेमचंद","हंस","जयशंकर प्रसाद"],"ans":"भारतेन्दु हरिश्चंद्र"},
-            {"q":"किसे 'अलंकरण' कहते हैं?","options":["काव्य श्रृंगारिकता संवर्धन","वाक्य रचना","पाठ विभाजन","लेखन कौशल"],"ans":"काव्य श्रृंगारिकता संवर्धन"},
-            {"q":"'संज्ञा' किसे कहते हैं?","options":["नाम","क्रिया","विशेषण","क्रिया विशेषण"],"ans":"नाम"},
+            {"q":"रस सिद्धांत के प्रणेता माने जाते हैं:","options":["भरत मुनि","रामानंद","कालिदास","हरिवंश राय"],"ans":"भरत मुनि","topic":"रस"},
+            {"q":"'अंधेर नगरी' के लेखक कौन?","options":["भारतेन्दु हरिश्चंद्र","मुंशी प्रेमचंद","हंस","जयशंकर प्रसाद"],"ans":"भारतेन्दु हरिश्चंद्र","topic":"भारतेन्दु हरिश्चंद्र"},
+            {"q":"किसे 'अलंकरण' कहते हैं?","options":["काव्य श्रृंगारिकता संवर्धन","वाक्य रचना","पाठ विभाजन","लेखन कौशल"],"ans":"काव्य श्रृंगारिकता संवर्धन","topic":"अलंकार"},
+            {"q":"'संज्ञा' किसे कहते हैं?","options":["नाम","क्रिया","विशेषण","क्रिया विशेषण"],"ans":"नाम","topic":"संज्ञा"},
         ],
     },
 
     "computer science": {
         "Easy":[
-            {"q":"What is CPU?","options":["Central Processing Unit","Computer Processing Unit","Control Processing Unit","Central Program Unit"],"ans":"Central Processing Unit"},
-            {"q":"What does RAM stand for?","options":["Random Access Memory","Read Access Memory","Run Access Memory","Readily Available Memory"],"ans":"Random Access Memory"},
-            {"q":"Which device stores data permanently?","options":["Hard Disk","RAM","Cache","Register"],"ans":"Hard Disk"},
-            {"q":"Which is an input device?","options":["Keyboard","Monitor","Printer","Speaker"],"ans":"Keyboard"},
+            {"q":"What is CPU?","options":["Central Processing Unit","Computer Processing Unit","Control Processing Unit","Central Program Unit"],"ans":"Central Processing Unit","topic":"Computer Hardware"},
+            {"q":"What does RAM stand for?","options":["Random Access Memory","Read Access Memory","Run Access Memory","Readily Available Memory"],"ans":"Random Access Memory","topic":"Memory"},
+            {"q":"Which device stores data permanently?","options":["Hard Disk","RAM","Cache","Register"],"ans":"Hard Disk","topic":"Storage Devices"},
+            {"q":"Which is an input device?","options":["Keyboard","Monitor","Printer","Speaker"],"ans":"Keyboard","topic":"Input and Output Devices"},
         ],
         "Medium":[
-            {"q":"Which data structure uses LIFO?","options":["Stack","Queue","Array","Tree"],"ans":"Stack"},
-            {"q":"What does SQL relate to?","options":["Databases","Networks","Hardware","Operating Systems"],"ans":"Databases"},
-            {"q":"Firewall protects from?","options":["Network threats","Friction","Heat","Power"],"ans":"Network threats"},
-            {"q":"What is an algorithm?","options":["Step-by-step procedure","A language","A storage device","A type of hardware"],"ans":"Step-by-step procedure"},
+            {"q":"Which data structure uses LIFO?","options":["Stack","Queue","Array","Tree"],"ans":"Stack","topic":"Data Structures"},
+            {"q":"What does SQL relate to?","options":["Databases","Networks","Hardware","Operating Systems"],"ans":"Databases","topic":"Databases"},
+            {"q":"Firewall protects from?","options":["Network threats","Friction","Heat","Power"],"ans":"Network threats","topic":"Network Security"},
+            {"q":"What is an algorithm?","options":["Step-by-step procedure","A language","A storage device","A type of hardware"],"ans":"Step-by-step procedure","topic":"Algorithms"},
         ],
         "Hard":[
-            {"q":"Which sorting algorithm has O(n log n) average?","options":["Merge Sort","Bubble Sort","Selection Sort","Insertion Sort"],"ans":"Merge Sort"},
-            {"q":"Which is not a programming paradigm?","options":["Hardware","Object-oriented","Functional","Procedural"],"ans":"Hardware"},
-            {"q":"What is recursion?","options":["Function calling itself","Loop","Array operation","Sorting method"],"ans":"Function calling itself"},
-            {"q":"What does 'HTTP' stand for?","options":["HyperText Transfer Protocol","High Transfer Text Protocol","Hyperlink Transfer Tool Protocol","HyperText Translate Protocol"],"ans":"HyperText Transfer Protocol"},
+            {"q":"Which sorting algorithm has O(n log n) average?","options":["Merge Sort","Bubble Sort","Selection Sort","Insertion Sort"],"ans":"Merge Sort","topic":"Sorting Algorithms"},
+            {"q":"Which is not a programming paradigm?","options":["Hardware","Object-oriented","Functional","Procedural"],"ans":"Hardware","topic":"Programming Paradigms"},
+            {"q":"What is recursion?","options":["Function calling itself","Loop","Array operation","Sorting method"],"ans":"Function calling itself","topic":"Recursion"},
+            {"q":"What does 'HTTP' stand for?","options":["HyperText Transfer Protocol","High Transfer Text Protocol","Hyperlink Transfer Tool Protocol","HyperText Translate Protocol"],"ans":"HyperText Transfer Protocol","topic":"Networking Protocols"},
         ],
     },
 
     "python": {
         "Easy":[
-            {"q":"Which symbol starts a comment in Python?","options":["#","//","/*","--"],"ans":"#"},
-            {"q":"How to print in Python 3?","options":["print('hello')","echo 'hello'","printf('hello')","cout << 'hello'"],"ans":"print('hello')"},
-            {"q":"Which is a Python data type?","options":["List","Table","Record","Struct"],"ans":"List"},
-            {"q":"How to create a list?","options":["[1,2,3]","(1,2,3)","{1,2,3}","<1,2,3>"],"ans":"[1,2,3]"},
+            {"q":"Which symbol starts a comment in Python?","options":["#","//","/*","--"],"ans":"#","topic":"Python Basics"},
+            {"q":"How to print in Python 3?","options":["print('hello')","echo 'hello'","printf('hello')","cout << 'hello'"],"ans":"print('hello')","topic":"Input and Output"},
+            {"q":"Which is a Python data type?","options":["List","Table","Record","Struct"],"ans":"List","topic":"Data Types"},
+            {"q":"How to create a list?","options":["[1,2,3]","(1,2,3)","{1,2,3}","<1,2,3>"],"ans":"[1,2,3]","topic":"Lists"},
         ],
         "Medium":[
-            {"q":"What does 'len' do?","options":["Returns length","Deletes element","Prints value","Sorts list"],"ans":"Returns length"},
-            {"q":"How to define a function?","options":["def func():","function func()","func def:","create func()"],"ans":"def func():"},
-            {"q":"Which loop iterates until condition false?","options":["while","for","repeat","do-while"],"ans":"while"},
-            {"q":"How to import module math?","options":["import math","include math","using math","require math"],"ans":"import math"},
+            {"q":"What does 'len' do?","options":["Returns length","Deletes element","Prints value","Sorts list"],"ans":"Returns length","topic":"Built-in Functions"},
+            {"q":"How to define a function?","options":["def func():","function func()","func def:","create func()"],"ans":"def func():","topic":"Functions"},
+            {"q":"Which loop iterates until condition false?","options":["while","for","repeat","do-while"],"ans":"while","topic":"Loops"},
+            {"q":"How to import module math?","options":["import math","include math","using math","require math"],"ans":"import math","topic":"Modules"},
         ],
         "Hard":[
-            {"q":"What does list comprehension produce?","options":["New list","Dictionary","Set","Tuple"],"ans":"New list"},
-            {"q":"Which is mutable?","options":["List","Tuple","String","Int"],"ans":"List"},
-            {"q":"What does 'init' define?","options":["Constructor","Destructor","Method call","Static block"],"ans":"Constructor"},
-            {"q":"What is GIL in Python?","options":["Global Interpreter Lock","General Input Loop","Global Input Limit","Graphical Interface Layer"],"ans":"Global Interpreter Lock"},
+            {"q":"What does list comprehension produce?","options":["New list","Dictionary","Set","Tuple"],"ans":"New list","topic":"List Comprehensions"},
+            {"q":"Which is mutable?","options":["List","Tuple","String","Int"],"ans":"List","topic":"Data Types"},
+            {"q":"What does 'init' define?","options":["Constructor","Destructor","Method call","Static block"],"ans":"Constructor","topic":"Classes and Objects"},
+            {"q":"What is GIL in Python?","options":["Global Interpreter Lock","General Input Loop","Global Input Limit","Graphical Interface Layer"],"ans":"Global Interpreter Lock","topic":"Python Internals"},
         ],
     },
 
@@ -361,20 +375,24 @@ QUESTION_BANK = {
         "Easy": [
             {"question": "Which of the following is a type of OS?", 
              "options": ["Batch", "Compiler", "Linker", "Loader"], 
-             "answer": "Batch"},
+             "answer": "Batch",
+             "topic": "Types of Operating Systems"},
             {"question": "Which is the core part of an operating system?", 
              "options": ["Shell", "Kernel", "Command", "Script"], 
-             "answer": "Kernel"}
+             "answer": "Kernel",
+             "topic": "Kernel"}
         ],
         "Medium": [
             {"question": "Which scheduling algorithm gives the minimum average waiting time?", 
              "options": ["FCFS", "SJF", "RR", "Priority"], 
-             "answer": "SJF"}
+             "answer": "SJF",
+             "topic": "CPU Scheduling"}
         ],
         "Hard": [
             {"question": "Which of the following is not a type of fragmentation?", 
              "options": ["Internal", "External", "File", "None"], 
-             "answer": "File"}
+             "answer": "File",
+             "topic": "Memory Management"}
         ],
     },
 
@@ -382,20 +400,24 @@ QUESTION_BANK = {
         "Easy": [
             {"question": "Which keyword is used to create a class in Java?", 
              "options": ["class", "Class", "define", "object"], 
-             "answer": "class"},
+             "answer": "class",
+             "topic": "Classes and Objects"},
             {"question": "Which method is the entry point of a Java program?", 
              "options": ["main()", "start()", "init()", "run()"], 
-             "answer": "main()"}
+             "answer": "main()",
+             "topic": "Program Structure"}
         ],
         "Medium": [
             {"question": "Which of the following is not a Java primitive type?", 
              "options": ["int", "float", "boolean", "string"], 
-             "answer": "string"}
+             "answer": "string",
+             "topic": "Data Types"}
         ],
         "Hard": [
             {"question": "Which concept allows multiple methods with the same name?", 
              "options": ["Overloading", "Overriding", "Encapsulation", "Abstraction"], 
-             "answer": "Overloading"}
+             "answer": "Overloading",
+             "topic": "Polymorphism"}
         ],
     },
 
@@ -403,20 +425,24 @@ QUESTION_BANK = {
         "Easy": [
             {"question": "Which of the following is used to print output in C?", 
              "options": ["print()", "printf()", "cout", "cin"], 
-             "answer": "printf()"},
+             "answer": "printf()",
+             "topic": "Input and Output"},
             {"question": "Which header file is required for printf()?", 
              "options": ["<stdio.h>", "<stdlib.h>", "<conio.h>", "<math.h>"], 
-             "answer": "<stdio.h>"}
+             "answer": "<stdio.h>",
+             "topic": "Header Files"}
         ],
         "Medium": [
             {"question": "Which operator is used to get the address of a variable?", 
              "options": ["&", "*", "%", "#"], 
-             "answer": "&"}
+             "answer": "&",
+             "topic": "Pointers"}
         ],
         "Hard": [
             {"question": "Which of the following is not a storage class in C?", 
              "options": ["auto", "static", "register", "define"], 
-             "answer": "define"}
+             "answer": "define",
+             "topic": "Storage Classes"}
         ],
     },
 
@@ -424,76 +450,134 @@ QUESTION_BANK = {
         "Easy": [
             {"question": "Which of the following is used to print output in C++?", 
              "options": ["print()", "printf()", "cout", "echo"], 
-             "answer": "cout"},
+             "answer": "cout",
+             "topic": "Input and Output"},
             {"question": "Which operator is used for scope resolution in C++?", 
              "options": ["::", "->", ".", ":"], 
-             "answer": "::"}
+             "answer": "::",
+             "topic": "Operators"}
         ],
         "Medium": [
             {"question": "Which feature of OOP allows reusing code?", 
              "options": ["Encapsulation", "Polymorphism", "Inheritance", "Abstraction"], 
-             "answer": "Inheritance"}
+             "answer": "Inheritance",
+             "topic": "Inheritance"}
         ],
         "Hard": [
             {"question": "Which of the following is not a valid access specifier in C++?", 
              "options": ["public", "private", "protected", "secured"], 
-             "answer": "secured"}
+             "answer": "secured",
+             "topic": "Access Specifiers"}
         ],
     },
 
     # Add more subjects as needed: economics, accountancy, business studies, history, geography, sociology...
     "economics": {
         "Easy":[
-            {"q":"What does GDP stand for?","options":["Gross Domestic Product","Global Domestic Product","Government Debt Product","Gross Domestic Price"],"ans":"Gross Domestic Product"},
-            {"q":"What is scarce resource?","options":["Limited resource","Unlimited resource","Free resource","Abundant resource"],"ans":"Limited resource"},
-            {"q":"What is interest?","options":["Cost of borrowing money","Rent","Wage","Profit"],"ans":"Cost of borrowing money"},
-            {"q":"Who introduced invisible hand?","options":["Adam Smith","Keynes","Marx","Ricardo"],"ans":"Adam Smith"},
+            {"q":"What does GDP stand for?","options":["Gross Domestic Product","Global Domestic Product","Government Debt Product","Gross Domestic Price"],"ans":"Gross Domestic Product","topic":"National Income"},
+            {"q":"What is scarce resource?","options":["Limited resource","Unlimited resource","Free resource","Abundant resource"],"ans":"Limited resource","topic":"Scarcity"},
+            {"q":"What is interest?","options":["Cost of borrowing money","Rent","Wage","Profit"],"ans":"Cost of borrowing money","topic":"Money and Interest"},
+            {"q":"Who introduced invisible hand?","options":["Adam Smith","Keynes","Marx","Ricardo"],"ans":"Adam Smith","topic":"Classical Economics"},
         ],
         "Medium":[
-            {"q":"Demand curve slopes:","options":["Downward","Upward","Vertical","Horizontal"],"ans":"Downward"},
-            {"q":"What is inflation?","options":["Rise in general price level","Fall in prices","Stable prices","No change"],"ans":"Rise in general price level"},
-            {"q":"What is scarcity?","options":["Limited resources","Enough resources","Free goods","Unlimited goods"],"ans":"Limited resources"},
-            {"q":"What is barter?","options":["Direct exchange of goods","Use of money","Banking service","Taxation"],"ans":"Direct exchange of goods"},
+            {"q":"Demand curve slopes:","options":["Downward","Upward","Vertical","Horizontal"],"ans":"Downward","topic":"Demand"},
+            {"q":"What is inflation?","options":["Rise in general price level","Fall in prices","Stable prices","No change"],"ans":"Rise in general price level","topic":"Inflation"},
+            {"q":"What is scarcity?","options":["Limited resources","Enough resources","Free goods","Unlimited goods"],"ans":"Limited resources","topic":"Scarcity"},
+            {"q":"What is barter?","options":["Direct exchange of goods","Use of money","Banking service","Taxation"],"ans":"Direct exchange of goods","topic":"Money and Interest"},
         ],
         "Hard":[
-            {"q":"What is opportunity cost?","options":["Next best alternative foregone","Actual cost","Sunk cost","Accounting cost"],"ans":"Next best alternative foregone"},
-            {"q":"Which curve shows production possibilities?","options":["PPC","AD-AS","Supply","Demand"],"ans":"PPC"},
-            {"q":"What is monetary policy?","options":["Control by central bank","Fiscal action","Tax policy","Trade policy"],"ans":"Control by central bank"},
-            {"q":"What is Gini coefficient used for?","options":["Income inequality","Inflation measurement","Output measure","Trade balance"],"ans":"Income inequality"},
+            {"q":"What is opportunity cost?","options":["Next best alternative foregone","Actual cost","Sunk cost","Accounting cost"],"ans":"Next best alternative foregone","topic":"Opportunity Cost"},
+            {"q":"Which curve shows production possibilities?","options":["PPC","AD-AS","Supply","Demand"],"ans":"PPC","topic":"Production Possibilities"},
+            {"q":"What is monetary policy?","options":["Control by central bank","Fiscal action","Tax policy","Trade policy"],"ans":"Control by central bank","topic":"Monetary Policy"},
+            {"q":"What is Gini coefficient used for?","options":["Income inequality","Inflation measurement","Output measure","Trade balance"],"ans":"Income inequality","topic":"Income Inequality"},
         ],
     },
 
     # Minimal placeholder for other subjects so selection recognizes them.
-    "history": {"Easy":[{"q":"Who was first Mughal emperor?","options":["Babur","Akbar","Shah Jahan","Humayun"],"ans":"Babur"}], "Medium":[], "Hard":[]},
-    "geography": {"Easy":[{"q":"Largest continent is?","options":["Asia","Africa","Europe","Antarctica"],"ans":"Asia"}], "Medium":[], "Hard":[]},
-    "accountancy": {"Easy":[{"q":"Basic accounting eqn is:","options":["Assets = Liabilities + Equity","Assets + Liabilities = Equity","Assets = Revenue - Expenses","Assets = Capital - Liabilities"],"ans":"Assets = Liabilities + Equity"}], "Medium":[], "Hard":[]},
-    "business studies": {"Easy":[{"q":"Primary motive of business is?","options":["Profit Earning","Charity","Service","Employment"],"ans":"Profit Earning"}], "Medium":[], "Hard":[]},
-    "sociology": {"Easy":[{"q":"Study of society is called?","options":["Sociology","Psychology","Anthropology","Economics"],"ans":"Sociology"}], "Medium":[], "Hard":[]},
+    "history": {"Easy":[{"q":"Who was first Mughal emperor?","options":["Babur","Akbar","Shah Jahan","Humayun"],"ans":"Babur","topic":"Mughal Empire"}], "Medium":[], "Hard":[]},
+    "geography": {"Easy":[{"q":"Largest continent is?","options":["Asia","Africa","Europe","Antarctica"],"ans":"Asia","topic":"Continents"}], "Medium":[], "Hard":[]},
+    "accountancy": {"Easy":[{"q":"Basic accounting eqn is:","options":["Assets = Liabilities + Equity","Assets + Liabilities = Equity","Assets = Revenue - Expenses","Assets = Capital - Liabilities"],"ans":"Assets = Liabilities + Equity","topic":"Accounting Equation"}], "Medium":[], "Hard":[]},
+    "business studies": {"Easy":[{"q":"Primary motive of business is?","options":["Profit Earning","Charity","Service","Employment"],"ans":"Profit Earning","topic":"Nature of Business"}], "Medium":[], "Hard":[]},
+    "sociology": {"Easy":[{"q":"Study of society is called?","options":["Sociology","Psychology","Anthropology","Economics"],"ans":"Sociology","topic":"Introduction to Sociology"}], "Medium":[], "Hard":[]},
 }
 
-# Helper to list valid subjects based on our bank keys
-BANK_SUBJECTS = sorted(list(QUESTION_BANK.keys()))
+# Every bank subject is a taxonomy subject; list the ones that have questions
+for _subject in QUESTION_BANK:
+    TAXONOMY.add_subject(_subject)
+BANK_SUBJECTS = [s for s in TAXONOMY.names() if s in QUESTION_BANK]
+
+# Stable id per bank question, used by revision cards and quiz checkpoints. It
+# is derived from the question's content ("subject/Difficulty/<hash of text
+# and answer>"), so adding or removing other questions never shifts it.
+for _subject, _levels in QUESTION_BANK.items():
+    for _difficulty, _questions in _levels.items():
+        for _q in _questions:
+            _content = "\x1f".join([_q.get("q") or _q.get("question", ""), _q.get("ans") or _q.get("answer", "")])
+            _q["id"] = f"{_subject}/{_difficulty}/{hashlib.sha1(_content.encode('utf-8')).hexdigest()[:12]}"
+QUESTIONS_BY_ID = {q["id"]: q for levels in QUESTION_BANK.values() for qs in levels.values() for q in qs}
 
 # ---- Quiz Generator utilities ----
 
 def get_available_questions(subject, difficulty):
     """Return list of question dicts for subject & difficulty (subject already normalized)."""
-    subj_lower = subject.lower()
+    subj_lower = TAXONOMY.canonical(subject) or subject.lower()
     bank = QUESTION_BANK.get(subj_lower, {})
     return bank.get(difficulty, [])
 
-def sample_questions(subject, difficulty, num_questions):
-    """Return up to num_questions unique questions (no repeats)."""
+def sample_questions(subject, difficulty, num_questions, priority_ids=()):
+    """Return up to num_questions unique questions (no repeats).
+
+    Questions whose id is in priority_ids (e.g. due revision cards) come first.
+    """
     pool = get_available_questions(subject, difficulty)
     if not pool:
         return []
     # ensure we don't mutate original
     pool_copy = pool[:]
     random.shuffle(pool_copy)
+    if priority_ids:
+        rank = {qid: r for r, qid in enumerate(priority_ids)}
+        pool_copy.sort(key=lambda q: rank.get(q.get("id"), len(rank)))
     if num_questions >= len(pool_copy):
         return pool_copy
     return pool_copy[:num_questions]
 
+def grade_quiz(quiz, answers, subject):
+    """Return (results, correct) where results are (i, chosen, correct_ans, is_correct, question_text, topic)."""
+    correct = 0
+    results = []
+    for i, q in enumerate(quiz):
+        chosen = answers.get(i)
+        correct_ans = q.get('ans') or q.get('answer')
+        is_correct = (chosen == correct_ans)
+        question_text = q.get('q') or q.get('question')
+        topic = q.get('topic', subject.title())
+        results.append((i, chosen, correct_ans, is_correct, question_text, topic))
+        if is_correct:
+            correct += 1
+    return results, correct
+
+def restore_quiz(saved):
+    """Put a checkpointed quiz (see session_store.QuizCheckpoint) back into session_state and its widgets."""
+    params, quiz = saved["params"], saved["questions"]
+    answers = {i: (quiz[i]["options"][opt] if opt is not None else None) for i, opt in saved["answers"].items()}
+    st.session_state.quiz_subject_choice = params["subject"]
+    st.session_state.quiz_difficulty_choice = params["difficulty"]
+    st.session_state.quiz_num_questions = params["num"]
+    st.session_state.quiz_params = params
+    st.session_state.quiz3 = quiz
+    st.session_state.quiz3_due = saved.get("due", 0)
+    st.session_state.answers3 = answers
+    st.session_state.submitted3 = saved["submitted"]
+    for i, choice in answers.items():
+        # widget value and marker agree, so the restored answer counts as given
+        st.session_state[f"quiz3_q{i}"] = choice
+        st.session_state[f"marker_q{i}"] = choice
+    if saved["submitted"]:
+        results, correct = grade_quiz(quiz, answers, params["subject"])
+        st.session_state.quiz3_results = results
+        st.session_state.quiz3_score = (correct, len(quiz))
+
 # ---------------------------
 # UI: Combined App
 # ---------------------------
@@ -501,8 +585,56 @@ def sample_questions(subject, difficulty, num_questions):
 st.set_page_config(page_title="AI Study Assistant + Quiz Generator", layout="wide")
 st.title("📚 AI-Powered Smart Study Assistant")
 
+
+@st.cache_resource
+def load_session_store():
+    """Process-wide session store (backend chosen by STUDY_SESSION_STORE)."""
+    return session_store.open_store()
+
+
+# Quiz progress is checkpointed under a session id kept in the URL, so a
+# reload, a restart or another replica picks the quiz up where it was left.
+# The id is not a credential: a quiz started under a student name only comes
+# back once that name is entered again, and every restore moves it to a new
+# id so an old (shared, bookmarked) link no longer opens it.
+if not re.fullmatch(r"[0-9a-f]{32}", st.query_params.get("sid", "")):
+    st.query_params["sid"] = uuid.uuid4().hex
+quiz_checkpoint = session_store.QuizCheckpoint(load_session_store(), st.query_params["sid"])
+if "_quiz_restored" not in st.session_state:
+    saved_quiz = quiz_checkpoint.restore(QUESTIONS_BY_ID)
+    owner = (saved_quiz or {}).get("student", "")
+    if saved_quiz is None or revision.user_key(owner) == revision.user_key(st.session_state.get("student_name")):
+        st.session_state["_quiz_restored"] = True
+        if saved_quiz:
+            quiz_checkpoint.move(uuid.uuid4().hex)
+            st.query_params["sid"] = quiz_checkpoint.sid
+            restore_quiz(saved_quiz)
+    else:
+        st.sidebar.info("This link has a quiz in progress. Enter the student name it was started under to resume it.")
+
+# Revision deck of the current student (fed by quiz mistakes). Without a
+# name the deck belongs to this browser session only and is never saved.
+student_name = st.sidebar.text_input("👤 Student name", key="student_name", help="Your revision schedule is saved under this name.").strip()
+if student_name:
+    deck = revision.load_deck(student_name)
+else:
+    deck = st.session_state.setdefault("_session_deck", revision.RevisionDeck("guest"))
+    st.sidebar.caption("Enter your name to keep your revision schedule between visits.")
+
 # Tabs:
-tab1, tab2, tab3 = st.tabs(["📅 Study Planner", "❓ Question Generator", "📝 Quiz Generator"])
+tab1, tab2, tab3, tab4 = st.tabs(["📅 Study Planner", "❓ Question Generator", "📝 Quiz Generator", "🔎 Question Search"])
+
+
+@st.cache_resource
+def load_search_index():
+    """Process-wide search index, with the question bank kept up to date."""
+    index = search_index.SearchIndex.load()
+    if search_index.add_bank(index, QUESTION_BANK):
+        index.save()
+    return index
+
+
+question_index = load_search_index()
 
 # ---------------------------
 # Tab 1 - Study Planner 
@@ -524,14 +656,29 @@ with tab1:
         with col2:
             difficulty = st.selectbox(f"Difficulty for {i+1}", ["Easy", "Medium", "Hard"], key=f"diff_{i}")
         if subject_name:
-            if subject_name not in VALID_SUBJECTS:
-                st.error(f"⚠ '{subject_name}' is not a valid subject name. Please enter a real subject.")
+            match = TAXONOMY.resolve(subject_name)
+            if match is None:
+                hint = ", ".join(TAXONOMY.display_name(TAXONOMY.canonical(name)) for _, name in TAXONOMY.suggest(subject_name, limit=3))
+                st.error(f"⚠ '{subject_name}' is not a valid subject name. Please enter a real subject." + (f" Did you mean: {hint}?" if hint else ""))
             else:
-                subjects.append((subject_name.capitalize(), difficulty))
+                display = TAXONOMY.display_name(match.subject)
+                if not match.exact:
+                    st.info(f"Interpreting '{subject_name}' as {display}.")
+                if any(name == display for name, _ in subjects):
+                    st.warning(f"⚠ {display} is already in the list.")
+                else:
+                    subjects.append((display, difficulty))
+
+    include_revision = st.checkbox("Include due revision topics from my quiz mistakes", value=True, key="plan_revision")
 
     if st.button("Generate Study Plan"):
         if subjects:
-            plan = generate_study_plan(subjects, exam_date, daily_hours)
+            revision_topics = None
+            if include_revision:
+                until = datetime.datetime.combine(exam_date, datetime.time.max).timestamp()
+                revision_topics = deck.topics_by_day(until)
+            with profiling.span("plan.generate", subjects=len(subjects)):
+                plan = generate_study_plan(subjects, exam_date, daily_hours, revision_topics)
 
             if isinstance(plan[0], dict):
                 st.success("✅ Study Plan Generated!")
@@ -541,12 +688,14 @@ with tab1:
 
                 # Download as Excel
                 excel_file = io.BytesIO()
-                df.to_excel(excel_file, index=False, engine="openpyxl")
+                with profiling.span("export.plan_excel", days=len(plan)):
+                    df.to_excel(excel_file, index=False, engine="openpyxl")
                 excel_file.seek(0)
                 st.download_button("⬇ Download as Excel", data=excel_file, file_name="study_plan.xlsx")
 
                 # Download as PDF
-                pdf_bytes = export_plan_to_pdf(plan)
+                with profiling.span("export.plan_pdf", days=len(plan)):
+                    pdf_bytes = export_plan_to_pdf(plan)
                 st.download_button("⬇ Download as PDF", data=pdf_bytes, file_name="study_plan.pdf", mime="application/pdf")
             else:
                 st.error(plan[0])
@@ -560,58 +709,20 @@ with tab2:
     st.header("❓ AI Question Generator")
 
     uploaded_file = st.file_uploader("📂 Upload syllabus (PDF or TXT)", type=["pdf", "txt"])
+    course_name = st.text_input(
+        "Course name (optional)", key="course_name",
+        help="Keeps a topic index for this course; re-uploads only re-process pages that changed.",
+    ).strip()
 
-    def clean_text(text):
-        text = re.sub(r'(?i)(lecture\s*notes?|prepared\s*by.|page\s\d+|contents?|index|chapter\s*\d+)', '', text)
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+    # Cleaning and question generation live in syllabus.py so the batch CLI shares them
+    clean_text = syllabus.clean_text
+    generate_questions_from_text = syllabus.generate_questions_from_text
 
     # Short 4–5 word question maker
     def shorten(q):
         words = q.split()
         return " ".join(words[:5]).capitalize()
 
-    def generate_questions_from_text(text):
-        # Extract keywords/concepts from text
-        sentences = [s.strip() for s in text.split(".") if len(s.strip()) > 30]
-        random.shuffle(sentences)
-
-        mcqs, very_short, short_qs, long_qs = [], [], [], []
-
-        # Predefined question patterns
-        patterns = [
-            "Write a detailed note on {}",
-            "Explain the difference between {} and {}",
-            "Explain the types of {}",
-            "Describe the architecture of {}",
-            "Explain the concept of {}"
-        ]
-
-        for i, s in enumerate(sentences[:20]):
-            concept = s.split()[0:5]  # take first few words as concept
-            concept_text = " ".join(concept)
-
-            # MCQs
-            if i < 5:
-                mcq_question = f"{patterns[i % len(patterns)].format(concept_text, concept_text)}"
-                options = [f"{concept_text} Option {x}" for x in "ABCD"]
-                answer = options[0]
-                mcqs.append((mcq_question, options, answer))
-
-            # Very Short
-            elif i < 10:
-                very_short.append(f"Define briefly: {concept_text}")
-
-            # Short
-            elif i < 15:
-                short_qs.append(f"Explain shortly: {patterns[i % len(patterns)].format(concept_text, concept_text)}")
-
-            # Long
-            else:
-                long_qs.append(f"{patterns[i % len(patterns)].format(concept_text, concept_text)}")
-
-        return {"MCQ": mcqs, "Very Short": very_short, "Short": short_qs, "Long": long_qs}
-
 
     def export_questions_to_pdf(questions_dict):
         pdf_buffer = io.BytesIO()
@@ -636,19 +747,91 @@ with tab2:
         pdf_buffer.seek(0)
         return pdf_buffer.getvalue()
 
-    if uploaded_file is not None:
-        file_name = uploaded_file.name
+    def read_uploaded_text(uploaded_file):
+        """Return (cleaned text, per-page report, raw page texts) for an upload."""
+        try:
+            text, pages = uploads.read_upload(uploaded_file)
+        except PdfReadError:
+            text, pages = "", []
+        page_texts = [p.text for p in pages] if pages else topic_index.split_text_pages(text)
 
-        if file_name.endswith(".pdf"):
-            reader = PdfReader(uploaded_file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() or ""
-        else:
-            text = uploaded_file.read().decode("utf-8", errors="ignore")
+        with profiling.span("text.clean", chars=len(text)):
+            return clean_text(text), pages, page_texts
 
-        text = clean_text(text)
-        questions = generate_questions_from_text(text)
+    if uploaded_file is not None:
+        # Every button click below reruns the script; keep the cleaned text per
+        # upload so we don't parse the same file again on each rerun.
+        cache_key = (uploaded_file.file_id, uploaded_file.size)
+        text_cache = st.session_state.setdefault("_text_cache", {})
+        if cache_key in text_cache:
+            profiling.count("text_cache.hit")
+            text, pages, page_texts = text_cache[cache_key]
+        else:
+            profiling.count("text_cache.miss")
+            try:
+                text, pages, page_texts = read_uploaded_text(uploaded_file)
+            except uploads.UploadRejected as e:
+                st.error(f"⚠ {e}")
+                st.stop()
+            text_cache.clear()
+            text_cache[cache_key] = (text, pages, page_texts)
+
+        if uploaded_file.name.endswith(".pdf"):
+            if not pages:
+                st.error("⚠ Could not extract text from PDF")
+            scanned = [p for p in pages if p.method != "text"]
+            if scanned:
+                missing = [p.number for p in scanned if p.method == "empty"]
+                if missing and not syllabus.ocr_available():
+                    st.warning(f"⚠ {len(missing)} page(s) look scanned but OCR is not installed (pypdfium2, pytesseract, tesseract). Their text is missing.")
+                elif missing:
+                    st.warning(f"⚠ No text could be read from page(s): {', '.join(map(str, missing))}")
+                failed = [p.number for p in scanned if p.method == "ocr-error"]
+                if failed:
+                    st.warning(f"⚠ OCR failed on page(s): {', '.join(map(str, failed))}. The other pages were kept.")
+                with st.expander(f"📄 Page extraction details ({len(scanned)} of {len(pages)} page(s) needed OCR)"):
+                    st.dataframe(pd.DataFrame(
+                        [{"Page": p.number, "Method": p.method, "Characters": len(p.text), "Time (ms)": round(p.seconds * 1000, 1)} for p in pages]
+                    ))
+
+        if course_name:
+            # Index once per upload/course pair, not on every button rerun
+            if st.session_state.get("_indexed_for") != (cache_key, course_name):
+                index, summary = topic_index.update_index(course_name, page_texts)
+                st.session_state["_course_index"] = (index, summary)
+                st.session_state["_indexed_for"] = (cache_key, course_name)
+            index, summary = st.session_state["_course_index"]
+
+            if summary["skipped"]:
+                st.warning(f"⚠ No text could be read from this upload, so the stored index for {course_name} was left unchanged.")
+            else:
+                st.info(
+                    f"📚 {course_name}: {summary['processed']} new/changed page(s) processed, "
+                    f"{summary['reused']} reused, {summary['removed']} removed since the last upload."
+                )
+            with st.expander("🗂 Topic index"):
+                for topic in topic_index.build_topics(index):
+                    st.markdown(f"**{topic['heading']}** ({topic_index.format_spans(topic['pages'])})")
+                    for concept, spans in topic["concepts"].items():
+                        st.write(f"• {concept} — {topic_index.format_spans(spans)}")
+            questions = topic_index.merged_questions(index)
+        else:
+            with profiling.span("questions.generate", chars=len(text)):
+                questions = generate_questions_from_text(text)
+
+        detected = TAXONOMY.find_in(course_name or os.path.splitext(uploaded_file.name)[0])
+        if detected:
+            st.caption(f"📎 Subject: {TAXONOMY.display_name(detected.subject)}")
+
+        # Make the generated questions searchable in Tab 4 (once per upload); an
+        # unreadable course upload must not replace the course's indexed questions
+        unreadable_course = bool(course_name) and summary["skipped"]
+        if st.session_state.get("_search_indexed_for") != (cache_key, course_name) and not unreadable_course:
+            generated_source = course_name or uploaded_file.name
+            generated_subject = detected.subject if detected else generated_source
+            if search_index.add_generated(question_index, questions, generated_subject, generated_source, replace=True):
+                question_index.save()
+            st.session_state["_search_indexed_for"] = (cache_key, course_name)
 
         st.subheader("📘 Choose question type to view:")
 
@@ -672,7 +855,8 @@ with tab2:
                 st.markdown(f"Q: {q}")
                 st.markdown("---")
 
-            pdf_bytes = export_questions_to_pdf({selected_type: questions[selected_type]})
+            with profiling.span("export.questions_pdf", qtype=selected_type):
+                pdf_bytes = export_questions_to_pdf({selected_type: questions[selected_type]})
             st.download_button(
                 label="⬇ Download as PDF",
                 data=pdf_bytes,
@@ -690,13 +874,18 @@ with tab3:
     col_subj, col_diff, col_num = st.columns([2,2,2])
 
     # Subject selector with "None" default
-    subject_choice = col_subj.selectbox("Choose Subject", options=["None"] + BANK_SUBJECTS, index=0, key="quiz_subject_choice")
+    subject_choice = col_subj.selectbox(
+        "Choose Subject", options=["None"] + BANK_SUBJECTS, index=0, key="quiz_subject_choice",
+        format_func=lambda s: s if s == "None" else TAXONOMY.display_name(s),
+    )
 
     # Difficulty selector with "None" default
     difficulty_choice = col_diff.selectbox("Choose Difficulty", options=["None", "Easy", "Medium", "Hard"], index=0, key="quiz_difficulty_choice")
 
     # Number of questions
-    num_questions_requested = col_num.number_input("Number of Questions", min_value=1, max_value=50, value=5, key="quiz_num_questions")
+    # default seeded via session_state, which a restored quiz may already have set
+    st.session_state.setdefault("quiz_num_questions", 5)
+    num_questions_requested = col_num.number_input("Number of Questions", min_value=1, max_value=50, key="quiz_num_questions")
 
     st.markdown("---")
 
@@ -706,13 +895,14 @@ with tab3:
         # ensure quiz state cleared
         if 'quiz3' in st.session_state:
             st.session_state.pop('quiz3', None)
+            quiz_checkpoint.clear()
         if 'answers3' in st.session_state:
             st.session_state.pop('answers3', None)
         if 'submitted3' in st.session_state:
             st.session_state.pop('submitted3', None)
     else:
         # handle invalid subject (shouldn't happen since choices from bank) but check
-        if subject_choice.lower() not in QUESTION_BANK:
+        if TAXONOMY.canonical(subject_choice) not in QUESTION_BANK:
             st.error(f'⚠ "{subject_choice}" is not a valid subject. Please select a valid subject.')
         else:
             # fetch available pool size
@@ -741,59 +931,69 @@ with tab3:
 
                 if rebuild:
                     st.session_state.quiz_params = {'subject': subject_choice, 'difficulty': difficulty_choice, 'num': num_to_use}
-                    st.session_state.quiz3 = sample_questions(subject_choice, difficulty_choice, num_to_use)
+                    due_ids = deck.due(subject=subject_choice.lower())
+                    st.session_state.quiz3 = sample_questions(subject_choice, difficulty_choice, num_to_use, priority_ids=due_ids)
+                    due_set = set(due_ids)
+                    st.session_state.quiz3_due = sum(1 for q in st.session_state.quiz3 if q.get("id") in due_set)
                     # initialize answers dict with None to ensure no pre-selection
                     st.session_state.answers3 = {i: None for i in range(len(st.session_state.quiz3))}
                     st.session_state.submitted3 = False
+                    quiz_checkpoint.start(st.session_state.quiz_params, st.session_state.quiz3,
+                                          st.session_state.quiz3_due, extra={"student": student_name})
 
                 st.info(f"Quiz loaded: {len(st.session_state.quiz3)} question(s) — {subject_choice} ({difficulty_choice})")
+                if st.session_state.get("quiz3_due"):
+                    st.caption(f"🔁 Includes {st.session_state.quiz3_due} question(s) due for revision.")
 
                 # Display quiz questions
-                for idx, q in enumerate(st.session_state.quiz3):
-                    st.markdown(f"Q{idx+1}. {q.get('q', q.get('question', ''))}")
-                    # ensure options listed but no option pre-selected
-                    # Streamlit radio requires an index, so we implement with radio + a placeholder default that doesn't match any option (None)
-                    # To avoid preselection, we will render as radio with options and set index to 0 only if user had previously selected.
-                    prev_choice = st.session_state.answers3.get(idx, None)
-                    options = q['options'][:]
-                    # Show radio - to avoid auto-selection we supply index only when prev_choice is not None
-                    try:
-                        if prev_choice in options:
-                            default_index = options.index(prev_choice)
-                        else:
-                            default_index = None
-                        choice = st.radio("Select your answer:", options, index=None, key=f"quiz3_q{idx}", disabled=st.session_state.submitted3)
-                        # BUT to simulate "no pre-selection", if previously None and we set index=0, it will select 1st option — so we handle by:
-                        # If there was no prev_choice and not submitted, we treat the selection as None until user actively changes it.
-                        # We detect whether the widget changed from default by storing a hidden marker per question.
-                        marker_key = f"marker_q{idx}"
-                        if marker_key not in st.session_state:
-                            # first render; record the initial selection as sentinel
-                            st.session_state[marker_key] = choice
-                            # do not record into answers yet (leave None)
-                            if st.session_state[marker_key] == choice and st.session_state.answers3[idx] is None:
-                                # keep None
-                                pass
-                        # If user interacts (choice different from initial marker), set answer
-                        if st.session_state[marker_key] != choice:
-                            st.session_state.answers3[idx] = choice
-                            st.session_state[marker_key] = choice
-                    except Exception as e:
-                        # fallback simple radio (shouldn't happen)
-                        default_index=None
-                        if idx in st.session_state.answer3 and st.session_state.answer3[idx] in options:
-                            default_index= options.index(st.session_state.answer3[idx])
-
-                        choice = st.radio(
-                            "Select your answer:", 
-                            options,
-                            index=None,
-                            key=f"quiz3_q{idx}"
-                        )
-                        if not st.session_state.submitted3:
-                            st.session_state.answers3[idx] = choice
-
-                    st.markdown("---")
+                with profiling.span("quiz.render", questions=len(st.session_state.quiz3)):
+                    for idx, q in enumerate(st.session_state.quiz3):
+                        st.markdown(f"Q{idx+1}. {q.get('q', q.get('question', ''))}")
+                        # ensure options listed but no option pre-selected
+                        # Streamlit radio requires an index, so we implement with radio + a placeholder default that doesn't match any option (None)
+                        # To avoid preselection, we will render as radio with options and set index to 0 only if user had previously selected.
+                        prev_choice = st.session_state.answers3.get(idx, None)
+                        options = q['options'][:]
+                        # Show radio - to avoid auto-selection we supply index only when prev_choice is not None
+                        try:
+                            if prev_choice in options:
+                                default_index = options.index(prev_choice)
+                            else:
+                                default_index = None
+                            choice = st.radio("Select your answer:", options, index=None, key=f"quiz3_q{idx}", disabled=st.session_state.submitted3)
+                            # BUT to simulate "no pre-selection", if previously None and we set index=0, it will select 1st option — so we handle by:
+                            # If there was no prev_choice and not submitted, we treat the selection as None until user actively changes it.
+                            # We detect whether the widget changed from default by storing a hidden marker per question.
+                            marker_key = f"marker_q{idx}"
+                            if marker_key not in st.session_state:
+                                # first render; record the initial selection as sentinel
+                                st.session_state[marker_key] = choice
+                                # do not record into answers yet (leave None)
+                                if st.session_state[marker_key] == choice and st.session_state.answers3[idx] is None:
+                                    # keep None
+                                    pass
+                            # If user interacts (choice different from initial marker), set answer
+                            if st.session_state[marker_key] != choice:
+                                st.session_state.answers3[idx] = choice
+                                st.session_state[marker_key] = choice
+                                if choice in options:
+                                    quiz_checkpoint.answer(idx, options.index(choice))
+                        except Exception as e:
+                            # fallback simple radio (shouldn't happen)
+                            default_index=None
+                            if idx in st.session_state.answer3 and st.session_state.answer3[idx] in options:
+                                default_index= options.index(st.session_state.answer3[idx])
+
+                            choice = st.radio(
+                                "Select your answer:", 
+                                options,
+                                index=None,
+                                key=f"quiz3_q{idx}"
+                            )
+                            if not st.session_state.submitted3:
+                                st.session_state.answers3[idx] = choice
+
+                        st.markdown("---")
 
                 # Attempt count and submission logic
                 total_q = len(st.session_state.quiz3)
@@ -806,19 +1006,14 @@ with tab3:
 
                     if st.button("Submit Answers and Check Score", disabled=submit_disabled, key="submit_quiz3"):
                         st.session_state.submitted3 = True
+                        quiz_checkpoint.submit()
                         # compute results
-                        correct = 0
-                        results = []
-                        for i, q in enumerate(st.session_state.quiz3):
-                            chosen = st.session_state.answers3.get(i)
-                            correct_ans = q.get('ans') or q.get('answer')
-
-                            is_correct = (chosen == correct_ans)
-                            question_text = q.get('q') or q.get('question')
-                            results.append((i, chosen, correct_ans, is_correct, question_text))
-
-                            if is_correct:
-                                correct += 1
+                        results, correct = grade_quiz(st.session_state.quiz3, st.session_state.answers3, subject_choice)
+                        for q, (_, _, _, is_correct, _, topic) in zip(st.session_state.quiz3, results):
+                            if q.get('id'):
+                                deck.record(q['id'], is_correct, subject_choice.lower(), topic)
+                        if student_name:
+                            revision.save_deck(deck)
                         st.session_state.quiz3_results = results
                         st.session_state.quiz3_score = (correct, total_q)
                         # rerun to show results
@@ -831,7 +1026,7 @@ with tab3:
                     score_percent = (correct / total_q) * 100 if total_q > 0 else 0
 
                     wrong_topics = []
-                    for i, chosen, correct_ans, is_correct, qtext in results:
+                    for i, chosen, correct_ans, is_correct, qtext, topic in results:
                         st.markdown(f"Q{i+1}. {qtext}")
                         if chosen is None:
                             st.warning(f"⚠ Not Attempted. The correct answer was {correct_ans}.")
@@ -839,9 +1034,7 @@ with tab3:
                             st.success(f"✅ Correct! Your answer: {chosen}. (Correct: **{correct_ans})")
                         else:
                             st.error(f"❌ Incorrect. Your answer: {chosen}. Correct answer: **{correct_ans}.")
-                            # Extract topic keywords (you can refine this)
-                            topic_guess = qtext.split()[1:4]  # first few words after 'Q'
-                            wrong_topics.append(" ".join(topic_guess))
+                            wrong_topics.append(topic)
                         st.markdown("---")
 
                     # final score and balloons for good performance
@@ -855,20 +1048,83 @@ with tab3:
                         
                     if wrong_topics:
                         st.markdown("### 🔍 Suggested Revision Topics:")
-                        unique_topics = list(set(wrong_topics))
+                        unique_topics = list(dict.fromkeys(wrong_topics))
                         for t in unique_topics:
-                            st.write(f"• Go through {t} again — you answered a related question incorrectly.")
+                            next_due = deck.next_due(t, subject_choice.lower())
+                            when = f" Scheduled for revision on {datetime.date.fromtimestamp(next_due).strftime('%d-%b-%Y')}." if next_due else ""
+                            st.write(f"• Go through {t} again — you answered a related question incorrectly.{when}")
 
                     if st.button("Start Another Quiz", key="restart_quiz3"):
                         # reset quiz state
+                        quiz_checkpoint.clear()
                         st.session_state.pop('quiz3', None)
                         st.session_state.pop('answers3', None)
                         st.session_state.pop('submitted3', None)
                         st.session_state.pop('quiz3_results', None)
                         st.session_state.pop('quiz3_score', None)
                         st.session_state.pop('quiz_params', None)
+                        st.session_state.pop('quiz3_due', None)
                         # also remove markers
                         keys_to_remove = [k for k in list(st.session_state.keys()) if k.startswith("marker_q")]
                         for k in keys_to_remove:
                             st.session_state.pop(k, None)
                         st.experimental_rerun()
+
+# ---------------------------
+# Tab 4 - Question Search
+# ---------------------------
+with tab4:
+    st.header("🔎 Search Questions")
+    st.markdown("Search the question bank and every generated question set by words in the question, options or answer.")
+
+    col_query, col_subj, col_diff = st.columns([4, 2, 2])
+    search_query = col_query.text_input("Search", key="search_query", placeholder="e.g. Ohm's law")
+    question_index.refresh()  # other app processes may have indexed uploads
+    search_subject = col_subj.selectbox("Subject", ["All"] + question_index.subjects(), key="search_subject")
+    search_difficulty = col_diff.selectbox("Difficulty", ["All", "Easy", "Medium", "Hard"], key="search_difficulty")
+
+    if search_query.strip() or search_subject != "All" or search_difficulty != "All":
+        started = time.perf_counter()
+        hits = question_index.search(
+            search_query,
+            subject=None if search_subject == "All" else search_subject,
+            difficulty=None if search_difficulty == "All" else search_difficulty,
+            limit=50,
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        st.caption(f"{len(hits)} result(s) from {len(question_index)} indexed questions in {elapsed_ms:.1f} ms")
+
+        for score, (key, subject, difficulty, kind, question, options, answer, source) in hits:
+            st.markdown(f"**{question}**")
+            label = difficulty if kind == "bank" else kind
+            st.caption(f"{subject.title()} · {label} · {source}")
+            if options:
+                st.write("Options: " + " | ".join(options))
+            if answer:
+                st.write(f"Answer: {answer}")
+            st.markdown("---")
+    else:
+        st.info("Type a search term or pick a subject/difficulty to browse.")
+
+# ---------------------------
+# Admin diagnostics (only when STUDY_PROFILING=1 and STUDY_ADMIN_TOKEN is set)
+# ---------------------------
+ADMIN_TOKEN = os.environ.get("STUDY_ADMIN_TOKEN", "")
+
+if profiling.ENABLED and ADMIN_TOKEN:
+    with st.sidebar.expander("🛠 Diagnostics"):
+        token = st.text_input("Admin token", type="password", key="admin_token")
+        if token and hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+            stats = profiling.snapshot()
+            if stats["spans"]:
+                span_df = pd.DataFrame.from_dict(stats["spans"], orient="index").sort_values("total_ms", ascending=False)
+                st.dataframe(span_df.round(2))
+            else:
+                st.info("No timings recorded yet.")
+            if stats["counters"]:
+                st.write(stats["counters"])
+            st.download_button("⬇ Prometheus metrics", data=profiling.to_prometheus(), file_name="metrics.txt", mime="text/plain")
+            if st.button("Reset metrics", key="reset_metrics"):
+                profiling.reset()
+        elif token:
+            st.error("⚠ Wrong admin token.")
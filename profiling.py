@@ -0,0 +1,140 @@
+"""Opt-in timing spans and counters for the Study Assistant.
+
+Profiling is off unless STUDY_PROFILING=1 is set in the environment. When off,
+span() hands back one shared no-op object and count() returns immediately, so
+the instrumented code paths cost a function call and a flag check. When on,
+every finished span is also written as one JSON line to stderr through the
+"study.profiling" logger.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("STUDY_PROFILING", "").strip().lower() in ("1", "true", "yes", "on")
+
+logger = logging.getLogger("study.profiling")
+if ENABLED and not logger.handlers:
+    # the root logger stays at WARNING; give the span records their own handler
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Streamlit serves every browser session from its own thread, so the shared
+# tables below are guarded by one lock.
+_lock = threading.Lock()
+_spans = {}     # name -> [count, total_seconds, max_seconds]
+_counters = {}  # name -> int
+
+
+class _NullSpan:
+    """Stand-in returned while profiling is disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "fields", "start")
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            stats = _spans.get(self.name)
+            if stats is None:
+                _spans[self.name] = [1, elapsed, elapsed]
+            else:
+                stats[0] += 1
+                stats[1] += elapsed
+                if elapsed > stats[2]:
+                    stats[2] = elapsed
+        if logger.isEnabledFor(logging.INFO):
+            record = {"span": self.name, "ms": round(elapsed * 1000, 3)}
+            record.update(self.fields)
+            if exc_type is not None:
+                record["error"] = exc_type.__name__
+            logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        return False
+
+
+def span(name, **fields):
+    """Context manager timing one pipeline stage under `name`."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, fields)
+
+
+def count(name, n=1):
+    """Increment counter `name` (cache hits, misses...) by n."""
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot():
+    """Return a copy of the collected spans and counters."""
+    with _lock:
+        spans = {
+            name: {
+                "count": c,
+                "total_ms": total * 1000,
+                "avg_ms": (total / c) * 1000 if c else 0.0,
+                "max_ms": peak * 1000,
+            }
+            for name, (c, total, peak) in _spans.items()
+        }
+        counters = dict(_counters)
+    return {"spans": spans, "counters": counters}
+
+
+def reset():
+    """Drop everything collected so far."""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus():
+    """Render the current metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = [
+        "# HELP study_span_seconds Time spent in instrumented pipeline stages.",
+        "# TYPE study_span_seconds summary",
+    ]
+    for name, s in sorted(data["spans"].items()):
+        label = _label(name)
+        lines.append(f'study_span_seconds_count{{span="{label}"}} {s["count"]}')
+        lines.append(f'study_span_seconds_sum{{span="{label}"}} {s["total_ms"] / 1000:.6f}')
+    lines.append("# HELP study_span_seconds_max Slowest single run of each stage.")
+    lines.append("# TYPE study_span_seconds_max gauge")
+    for name, s in sorted(data["spans"].items()):
+        lines.append(f'study_span_seconds_max{{span="{_label(name)}"}} {s["max_ms"] / 1000:.6f}')
+    lines.append("# HELP study_events_total Counted events such as cache hits.")
+    lines.append("# TYPE study_events_total counter")
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f'study_events_total{{event="{_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
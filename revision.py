@@ -0,0 +1,247 @@
+"""Spaced-repetition revision engine driven by quiz mistakes.
+
+A missed quiz question becomes a card in the student's deck. Cards are
+rescheduled with SM-2 every time the question is answered again: a miss
+brings it back the next day, correct answers push it further out. Each deck
+keeps one heap per subject ordered by due time, so "what is due now" only
+touches the due cards instead of scanning the whole deck.
+
+Decks are stored as one JSON file per student under STUDY_DATA_DIR
+(default .study_data), named by a hash of the normalised student name with
+the readable name kept inside, and cached in-process between reruns. Several app
+processes may share a deck: the cache is re-read when the file's mtime
+changes, and saving merges in whatever another process wrote since (the
+copy of a card with more reviews wins) under a file lock.
+"""
+import contextlib
+import datetime
+import heapq
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; saves there are only atomic, not merged under a lock
+    fcntl = None
+
+import profiling
+
+DATA_DIR = os.environ.get("STUDY_DATA_DIR", ".study_data")
+DECK_DIR = os.path.join(DATA_DIR, "revision")
+
+DAY = 24 * 60 * 60
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# SM-2 answer quality used for quiz results (0-5 scale)
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+
+
+def sm2(card, quality):
+    """Apply one SM-2 review to `card` in place; returns the new interval in days."""
+    if quality < 3:
+        card["reps"] = 0
+        card["lapses"] = card.get("lapses", 0) + 1
+        card["interval"] = 1
+    else:
+        card["reps"] += 1
+        if card["reps"] == 1:
+            card["interval"] = 1
+        elif card["reps"] == 2:
+            card["interval"] = 6
+        else:
+            card["interval"] = round(card["interval"] * card["ease"])
+    card["ease"] = max(MIN_EASE, card["ease"] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return card["interval"]
+
+
+class RevisionDeck:
+    """One student's cards plus a per-subject heap of (due, version, card_id)."""
+
+    def __init__(self, user, cards=None):
+        self.user = user
+        self.cards = cards or {}
+        self.mtime = None   # mtime_ns of the deck file this copy last matched
+        self._lock = threading.Lock()
+        self._rebuild_heaps()
+
+    def _rebuild_heaps(self):
+        self._heaps = {}
+        for card_id, card in self.cards.items():
+            self._heaps.setdefault(card["subject"], []).append((card["due"], card["v"], card_id))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+
+    def merge(self, cards):
+        """Take in cards saved by another process; the more reviewed copy of each card wins."""
+        with self._lock:
+            changed = False
+            for card_id, card in cards.items():
+                mine = self.cards.get(card_id)
+                if mine is None or (card["v"], card["due"]) > (mine["v"], mine["due"]):
+                    self.cards[card_id] = card
+                    changed = True
+            if changed:
+                self._rebuild_heaps()
+
+    def record(self, card_id, correct, subject, topic, now=None):
+        """Feed one quiz answer into the deck.
+
+        Misses create or reset a card; correct answers only matter for cards
+        that are already being revised.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            card = self.cards.get(card_id)
+            if card is None:
+                if correct:
+                    return None
+                card = {"subject": subject, "topic": topic, "ease": DEFAULT_EASE,
+                        "interval": 0, "reps": 0, "lapses": 0, "due": now, "v": 0}
+                self.cards[card_id] = card
+            interval = sm2(card, QUALITY_CORRECT if correct else QUALITY_WRONG)
+            card["due"] = now + interval * DAY
+            card["v"] += 1
+            heap = self._heaps.setdefault(subject, [])
+            heapq.heappush(heap, (card["due"], card["v"], card_id))
+            # superseded entries are skipped lazily; rebuild once they pile up
+            if len(heap) > 2 * len(self.cards) + 16:
+                self._heaps[subject] = heap = [e for e in heap if self._live(e)]
+                heapq.heapify(heap)
+            return card
+
+    def _live(self, entry):
+        card = self.cards.get(entry[2])
+        return card is not None and card["v"] == entry[1]
+
+    def _due_entries(self, heap, until):
+        # Walk the heap as a tree: a node due after `until` has no due children,
+        # so this visits only the due entries and their direct children.
+        found, stack = [], [0] if heap else []
+        while stack:
+            i = stack.pop()
+            entry = heap[i]
+            if entry[0] > until:
+                continue
+            if self._live(entry):
+                found.append(entry)
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    stack.append(child)
+        return found
+
+    def due(self, now=None, subject=None, limit=None):
+        """Card ids due by `now`, most overdue first."""
+        now = time.time() if now is None else now
+        with self._lock, profiling.span("revision.due"):
+            heaps = [self._heaps.get(subject, [])] if subject is not None else self._heaps.values()
+            entries = []
+            for heap in heaps:
+                entries.extend(self._due_entries(heap, now))
+        entries.sort()
+        if limit is not None:
+            entries = entries[:limit]
+        return [card_id for _, _, card_id in entries]
+
+    def topics_by_day(self, until, now=None):
+        """Map date -> sorted "Subject: Topic" labels for cards due before `until`.
+
+        Anything already overdue is put on today's date.
+        """
+        now = time.time() if now is None else now
+        today = datetime.date.fromtimestamp(now)
+        days = {}
+        for card_id in self.due(now=until):
+            card = self.cards[card_id]
+            day = max(today, datetime.date.fromtimestamp(card["due"]))
+            days.setdefault(day, set()).add(f"{card['subject'].title()}: {card['topic']}")
+        return {day: sorted(labels) for day, labels in days.items()}
+
+    def next_due(self, topic, subject):
+        """Earliest due time of any card for this topic, or None."""
+        times = [c["due"] for c in self.cards.values() if c["subject"] == subject and c["topic"] == topic]
+        return min(times) if times else None
+
+
+_decks = {}
+_decks_lock = threading.Lock()
+
+
+def user_key(user):
+    """Normalised student name: NFC, case-folded, single spaces."""
+    return " ".join(unicodedata.normalize("NFC", user or "").casefold().split())
+
+
+def _deck_path(user):
+    # a hash, not a slug: "सीमा" and "सोमा" differ only in vowel signs a slug drops
+    digest = hashlib.sha256(user_key(user).encode("utf-8")).hexdigest()[:24]
+    return os.path.join(DECK_DIR, f"{digest}.json")
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_cards(path, user):
+    """(cards, mtime_ns) of `user`'s saved deck; ({}, None) if there is none."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            mtime = os.fstat(f.fileno()).st_mtime_ns
+            saved = json.load(f)
+        if user_key(saved["user"]) == user_key(user):
+            return saved["cards"], mtime
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}, None
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_deck(user):
+    """Return the cached deck for `user`, merging in changes saved by other processes."""
+    key = user_key(user)
+    path = _deck_path(user)
+    with _decks_lock:
+        deck = _decks.get(key)
+        if deck is None:
+            deck = _decks[key] = RevisionDeck(user)
+        if deck.mtime != _mtime(path):
+            cards, mtime = _read_cards(path, user)
+            deck.merge(cards)
+            deck.mtime = mtime
+    return deck
+
+
+def save_deck(deck):
+    """Write the deck, first merging in anything another process saved since it was read."""
+    os.makedirs(DECK_DIR, exist_ok=True)
+    path = _deck_path(deck.user)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with _file_lock(path):
+        if deck.mtime != _mtime(path):
+            cards, deck.mtime = _read_cards(path, deck.user)
+            deck.merge(cards)
+        with deck._lock:
+            payload = json.dumps({"user": deck.user, "cards": deck.cards}, ensure_ascii=False)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+        deck.mtime = _mtime(path)
@@ -0,0 +1,504 @@
+"""Full-text search over the question bank and generated questions.
+
+An inverted index maps each token to two parallel arrays: the ids of the
+documents containing it (ascending) and the term frequency in each. Arrays
+are plain `array` objects so adding documents is a cheap append; at query
+time they are viewed as numpy arrays without copying and ranked with BM25.
+Queries with a rare term only score the documents containing one; queries
+made only of very common terms accumulate scores into one dense per-document
+array instead.
+
+Tokenising is Unicode aware: a token is a run of letters, digits and
+combining marks, so Devanagari words keep their vowel signs ("संज्ञा" stays
+one token). Text is NFC-normalised and case-folded.
+
+Replacing a question only marks the old document dead. Once dead documents
+make up a quarter of the index they are dropped and the rest renumbered
+(compact). The index is persisted under STUDY_DATA_DIR (default .study_data)
+as a pickle snapshot plus a JSON-lines journal: save() only appends the adds
+and removals since the last save to the journal, which is cheap enough for
+the upload request. When the journal grows large, or compaction is due, a
+background thread compacts the index, writes a fresh snapshot and empties
+the journal. Loading replays the journal over the snapshot.
+
+Several app processes can share one data directory: journal appends and
+snapshots hold a file lock and first replay what other processes wrote, and
+refresh() lets each process pick up the others' changes before searching.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import threading
+import unicodedata
+from array import array
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; there, run a single app process per data dir
+    fcntl = None
+
+import numpy as np
+
+import profiling
+
+DATA_DIR = os.environ.get("STUDY_DATA_DIR", ".study_data")
+INDEX_PATH = os.path.join(DATA_DIR, "search_index.pkl")
+FORMAT_VERSION = 1
+# Compact once dead docs are over 1/4 of all stored docs (and at least this many)
+COMPACT_FRACTION = 4
+COMPACT_MIN_DEAD = 256
+# Rewrite the snapshot once the journal holds this many ops, or 1/10 of the live docs
+SNAPSHOT_MIN_OPS = 5000
+SNAPSHOT_FRACTION = 10
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Terms found in more than 1/8 of the documents only re-rank docs matched by
+# rarer query terms instead of being scored across the whole index.
+STOP_TERM_FRACTION = 8
+
+
+def _mark_class():
+    # Character class of all combining marks in the BMP (Mn, Mc, Me).
+    ranges = []
+    for cp in range(0x300, 0x10000):
+        if unicodedata.category(chr(cp))[0] == "M":
+            if ranges and ranges[-1][1] == cp - 1:
+                ranges[-1][1] = cp
+            else:
+                ranges.append([cp, cp])
+    return "".join(f"\\u{a:04x}-\\u{b:04x}" if a != b else f"\\u{a:04x}" for a, b in ranges)
+
+
+_TOKEN_RE = re.compile(rf"(?:[^\W_]|[{_mark_class()}])+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(unicodedata.normalize("NFC", text or "").casefold())
+
+
+class SearchIndex:
+    """Incrementally built inverted index over question documents."""
+
+    def __init__(self):
+        # doc id -> (key, subject, difficulty, kind, question, options, answer, source)
+        self.docs = []
+        self.hashes = []                 # doc id -> content hash
+        self.alive = array("B")          # 0 once a doc was replaced
+        self.lengths = array("I")        # doc id -> token count
+        self.subject_ids = array("I")
+        self.difficulty_ids = array("I")
+        self.postings = {}               # token -> (array("I") doc ids, array("I") tfs)
+        self.keys = {}                   # key -> current doc id
+        self.vocab = {"subject": {}, "difficulty": {}}
+        self.subject_counts = {}         # subject id -> live docs
+        self.total_length = 0
+        self.live_count = 0
+        self.dirty = False
+        self._lock = threading.RLock()
+        self._norm = None
+        self._norm_key = None
+        self._pending = []               # ops not yet in the journal
+        self._journal_ops = 0            # ops in the journal on disk
+        self._journal_offset = 0         # journal bytes already applied
+        self._snapshot_id = None         # (inode, mtime) of the snapshot we started from
+        self._snapshot_thread = None
+
+    def _field_id(self, field, value):
+        ids = self.vocab[field]
+        return ids.setdefault(value.casefold(), len(ids))
+
+    def add(self, key, question, options=(), answer="", subject="", difficulty="", kind="bank", source=""):
+        """Index one question; re-adding an unchanged key is a no-op.
+
+        Returns True when the index changed.
+        """
+        options = list(options or [])
+        body = "\n".join([question or "", *options, answer or ""])
+        digest = hashlib.sha1("\x1f".join([subject, difficulty, kind, source, body]).encode("utf-8")).hexdigest()
+        with self._lock:
+            old = self.keys.get(key)
+            if old is not None:
+                if self.hashes[old] == digest:
+                    return False
+                self._retire(old)
+
+            doc_id = len(self.docs)
+            tokens = tokenize(body)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                entry = self.postings.get(token)
+                if entry is None:
+                    entry = self.postings[token] = (array("I"), array("I"))
+                entry[0].append(doc_id)
+                entry[1].append(tf)
+
+            doc = (key, subject, difficulty, kind, question, options, answer, source)
+            sid = self._field_id("subject", subject)
+            self.docs.append(doc)
+            self.hashes.append(digest)
+            self.alive.append(1)
+            self.lengths.append(len(tokens))
+            self.subject_ids.append(sid)
+            self.difficulty_ids.append(self._field_id("difficulty", difficulty))
+            self.subject_counts[sid] = self.subject_counts.get(sid, 0) + 1
+            self.keys[key] = doc_id
+            self.total_length += len(tokens)
+            self.live_count += 1
+            self.dirty = True
+            self._pending.append(["add", *doc])
+            return True
+
+    def _retire(self, doc_id):
+        # Postings keep the old id; search drops it via `alive` until compact().
+        self.alive[doc_id] = 0
+        self.total_length -= self.lengths[doc_id]
+        self.live_count -= 1
+        self.subject_counts[self.subject_ids[doc_id]] -= 1
+
+    def remove(self, key):
+        with self._lock:
+            doc_id = self.keys.pop(key, None)
+            if doc_id is not None:
+                self._retire(doc_id)
+                self.dirty = True
+                self._pending.append(["remove", key])
+
+    def needs_compaction(self):
+        dead = len(self.docs) - self.live_count
+        return dead >= COMPACT_MIN_DEAD and dead * COMPACT_FRACTION >= len(self.docs)
+
+    def compact(self):
+        """Drop dead docs and renumber the live ones (postings stay sorted by id)."""
+        with self._lock, profiling.span("search.compact", docs=len(self.docs), live=self.live_count):
+            alive = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+            remap = (np.cumsum(alive) - 1).astype(np.uint32)
+            postings = {}
+            for token, (ids, tfs) in self.postings.items():
+                ids = np.frombuffer(ids, dtype=np.uint32)
+                keep = alive[ids]
+                if keep.any():
+                    postings[token] = (array("I", remap[ids[keep]].tobytes()),
+                                       array("I", np.frombuffer(tfs, dtype=np.uint32)[keep].tobytes()))
+            live = np.flatnonzero(alive)
+            self.docs = [self.docs[i] for i in live]
+            self.hashes = [self.hashes[i] for i in live]
+            self.alive = array("B", bytes([1])) * len(live)
+            for name in ("lengths", "subject_ids", "difficulty_ids"):
+                values = np.frombuffer(getattr(self, name), dtype=np.uint32)[alive]
+                setattr(self, name, array("I", values.tobytes()))
+            self.postings = postings
+            old_ids = np.fromiter(self.keys.values(), dtype=np.int64, count=len(self.keys))
+            self.keys = dict(zip(self.keys, remap[old_ids].tolist()))
+            self._norm_key = None
+
+    def __len__(self):
+        return self.live_count
+
+    def subjects(self):
+        """Subjects that currently have at least one live question."""
+        with self._lock:
+            return sorted(name for name, sid in self.vocab["subject"].items() if self.subject_counts.get(sid))
+
+    def search(self, query, subject=None, difficulty=None, limit=20):
+        """Return up to `limit` (score, doc) pairs, best first.
+
+        All query terms must match; if none match together the best partial
+        matches are returned instead. With no query terms the filter alone
+        selects the results.
+        """
+        with self._lock, profiling.span("search.query"):
+            terms = list(dict.fromkeys(tokenize(query)))
+            n = len(self.docs)
+            if n == 0:
+                return []
+            alive = np.frombuffer(self.alive, dtype=np.uint8)
+            mask = alive.astype(bool)
+            if subject:
+                sid = self.vocab["subject"].get(subject.casefold())
+                if sid is None:
+                    return []
+                mask &= np.frombuffer(self.subject_ids, dtype=np.uint32) == sid
+            if difficulty:
+                did = self.vocab["difficulty"].get(difficulty.casefold())
+                if did is None:
+                    return []
+                mask &= np.frombuffer(self.difficulty_ids, dtype=np.uint32) == did
+
+            if not terms:
+                ids = np.flatnonzero(mask)[:limit]
+                return [(0.0, self.docs[i]) for i in ids]
+
+            found = [self.postings[t] for t in terms if t in self.postings]
+            if not found:
+                return []
+
+            norm = self._length_norm()
+            postings = [(np.frombuffer(ids, dtype=np.uint32), np.frombuffer(tf, dtype=np.uint32)) for ids, tf in found]
+            rare = [ids for ids, _ in postings if len(ids) <= n // STOP_TERM_FRACTION]
+            if rare and len(rare) < len(postings):
+                # Only docs containing a rare term can rank well; score those
+                # few and look the common terms up in them by binary search.
+                docs = np.unique(np.concatenate(rare))
+                scores = np.zeros(len(docs), dtype=np.float32)
+                matched = np.zeros(len(docs), dtype=np.uint16)
+                for ids, tf in postings:
+                    pos = np.minimum(np.searchsorted(ids, docs), len(ids) - 1)
+                    present = ids[pos] == docs
+                    term_tf = np.where(present, tf[pos], 0).astype(np.float32)
+                    scores += self._idf(len(ids)) * term_tf * (BM25_K1 + 1) / (term_tf + norm[docs])
+                    matched += present
+                mask = mask[docs]
+            else:
+                # Accumulate scores and matched-term counts densely per doc:
+                # one vectorised pass however long the posting lists are.
+                docs = None
+                scores = np.zeros(n, dtype=np.float32)
+                matched = np.zeros(n, dtype=np.uint16)
+                for ids, tf in postings:
+                    tf = tf.astype(np.float32)
+                    scores[ids] += self._idf(len(ids)) * tf * (BM25_K1 + 1) / (tf + norm[ids])
+                    matched[ids] += 1
+
+            candidates = np.flatnonzero(mask & (matched == len(terms)))
+            if not len(candidates) and len(terms) > 1:
+                candidates = np.flatnonzero(mask & (matched > 0))
+            if not len(candidates):
+                return []
+
+            cand_scores = scores[candidates]
+            if docs is not None:
+                candidates = docs[candidates]
+            if len(candidates) > limit:
+                top = np.argpartition(-cand_scores, limit - 1)[:limit]
+            else:
+                top = np.arange(len(candidates))
+            top = top[np.lexsort((candidates[top], -cand_scores[top]))]
+            return [(float(cand_scores[i]), self.docs[candidates[i]]) for i in top]
+
+    def _idf(self, df):
+        return np.log(1 + (self.live_count - df + 0.5) / (df + 0.5))
+
+    def _length_norm(self):
+        # BM25 length normalisation per doc; cached until the index changes.
+        key = (len(self.docs), self.total_length)
+        if self._norm_key != key:
+            avg_len = self.total_length / max(self.live_count, 1)
+            lengths = np.frombuffer(self.lengths, dtype=np.uint32).astype(np.float32)
+            self._norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(avg_len, 1e-9))
+            self._norm_key = key
+        return self._norm
+
+    def save(self, path=INDEX_PATH):
+        """Append the changes since the last save to the journal.
+
+        Starts a background snapshot when the journal has grown large or
+        compaction is due.
+        """
+        with self._lock, profiling.span("search.save", ops=len(self._pending)):
+            if self._pending:
+                with _file_lock(path):
+                    self._catch_up(path)
+                    with open(_journal_path(path), "a", encoding="utf-8") as f:
+                        f.write("".join(json.dumps(op, ensure_ascii=False) + "\n" for op in self._pending))
+                        self._journal_offset = f.tell()
+                    self._journal_ops += len(self._pending)
+                    self._pending = []
+            self.dirty = False
+            due = self._journal_ops >= max(SNAPSHOT_MIN_OPS, self.live_count // SNAPSHOT_FRACTION)
+            if (due or self.needs_compaction()) and not (self._snapshot_thread and self._snapshot_thread.is_alive()):
+                self._snapshot_thread = threading.Thread(
+                    target=self.snapshot, args=(path,), name="search-index-snapshot", daemon=True)
+                self._snapshot_thread.start()
+
+    def snapshot(self, path=INDEX_PATH):
+        """Compact if due, write the whole index and empty the journal.
+
+        Runs under the file lock after replaying what other processes
+        journaled, so the snapshot holds every process's changes.
+        """
+        with self._lock, _file_lock(path), profiling.span("search.snapshot", docs=len(self.docs)):
+            self._catch_up(path)
+            if self.needs_compaction():
+                self.compact()
+            state = {k: v for k, v in self.__dict__.items() if not k.startswith("_") and k != "dirty"}
+            state["version"] = FORMAT_VERSION
+            state["byteorder"] = sys.byteorder  # arrays are pickled as raw bytes
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            # a crash before this truncation only replays ops the snapshot already has
+            open(_journal_path(path), "w").close()
+            self._snapshot_id = _file_id(path)
+            self._journal_offset = 0
+            self._journal_ops = 0
+            self._pending = []
+            self.dirty = False
+
+    def refresh(self, path=INDEX_PATH):
+        """Pick up changes saved by other processes; two stat() calls when there are none."""
+        if _file_id(path) == self._snapshot_id and _file_size(_journal_path(path)) == self._journal_offset:
+            return False
+        with self._lock, _file_lock(path):
+            self._catch_up(path)
+        return True
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """Load the snapshot and replay the journal; empty if there is neither."""
+        index = cls()
+        with index._lock, _file_lock(path):
+            index._read_snapshot(path)
+            index._read_journal(path)
+        index.dirty = False
+        return index
+
+    def _catch_up(self, path):
+        # Caller holds self._lock and the file lock.
+        if _file_id(path) != self._snapshot_id:
+            # Another process wrote a snapshot (holding everything journaled
+            # before it): start over from it and redo our unsaved changes.
+            pending = self._pending
+            lock, thread = self._lock, self._snapshot_thread
+            self.__init__()
+            self._lock, self._snapshot_thread = lock, thread
+            self._read_snapshot(path)
+            for op in pending:
+                self._apply(op)
+        self._read_journal(path)
+
+    def _read_snapshot(self, path):
+        self._snapshot_id = _file_id(path)
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        if state.pop("version", None) != FORMAT_VERSION or state.pop("byteorder", None) != sys.byteorder:
+            return
+        self.__dict__.update(state)
+        if "subject_counts" not in state:  # snapshots written before live counts were kept
+            live = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+            sids, counts = np.unique(np.frombuffer(self.subject_ids, dtype=np.uint32)[live], return_counts=True)
+            self.subject_counts = dict(zip(sids.tolist(), counts.tolist()))
+        self._norm_key = None
+
+    def _read_journal(self, path):
+        """Apply journal lines past our offset (written by other processes)."""
+        pending, self._pending = self._pending, []
+        try:
+            with open(_journal_path(path), "rb") as f:
+                f.seek(self._journal_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # cut short by a crash
+                    self._journal_offset += len(line)
+                    self._journal_ops += 1
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, TypeError, IndexError):
+                        continue
+        except OSError:
+            pass
+        self._pending = pending  # only our own changes still need journaling
+
+    def _apply(self, op):
+        if op[0] == "add":
+            key, subject, difficulty, kind, question, options, answer, source = op[1:]
+            self.add(key, question, options, answer, subject, difficulty, kind, source)
+        elif op[0] == "remove":
+            self.remove(op[1])
+
+
+def _journal_path(path):
+    return f"{path}.journal"
+
+
+def _file_id(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Serialise journal appends and snapshots across processes (where fcntl exists)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def add_bank(index, question_bank):
+    """Index every QUESTION_BANK entry; unchanged questions are skipped.
+
+    Bank questions that are no longer in `question_bank` are removed.
+    """
+    changed = 0
+    ids = set()
+    for subject, levels in question_bank.items():
+        for difficulty, questions in levels.items():
+            for q in questions:
+                ids.add(q["id"])
+                changed += index.add(
+                    q["id"], q.get("q") or q.get("question", ""), q.get("options", []),
+                    q.get("ans") or q.get("answer", ""), subject=subject, difficulty=difficulty,
+                    kind="bank", source="Question bank",
+                )
+    with index._lock:
+        stale = [key for key, doc_id in index.keys.items() if index.docs[doc_id][3] == "bank" and key not in ids]
+    for key in stale:
+        index.remove(key)
+    return changed + len(stale)
+
+
+def add_generated(index, questions, subject, source, replace=False):
+    """Index a Tab 2 {type: [questions]} dict under `subject`.
+
+    Keys include `source`, so two uploads that produce the same question
+    each own their copy and replacing one never drops the other's.
+
+    With replace=True, generated questions previously indexed from the same
+    source that are not in `questions` are dropped (re-uploads of a course or file).
+    """
+    changed = 0
+    keys = set()
+    for qtype, qlist in questions.items():
+        for q in qlist:
+            if isinstance(q, (tuple, list)):
+                text, options, answer = q
+            else:
+                text, options, answer = q, [], ""
+            key = "generated/" + hashlib.sha1(f"{subject}\x1f{source}\x1f{qtype}\x1f{text}".encode("utf-8")).hexdigest()
+            keys.add(key)
+            changed += index.add(key, text, options, answer, subject=subject, kind=qtype, source=source)
+    if replace:
+        with index._lock:
+            stale = [key for key, doc_id in index.keys.items()
+                     if key.startswith("generated/") and key not in keys and index.docs[doc_id][7] == source]
+        for key in stale:
+            index.remove(key)
+        changed += len(stale)
+    return changed
@@ -0,0 +1,258 @@
+"""Quiz progress kept outside the Streamlit process.
+
+`st.session_state` dies with the process and is invisible to other app
+replicas, so the quiz tab also checkpoints its state to a SessionStore keyed
+by a session id carried in the page URL (?sid=...). After a restart, or when
+a load balancer sends the browser to another replica, the quiz is restored
+from the store.
+
+The sid is not a credential. The app never restores the student name from a
+checkpoint. A quiz saved under a name resumes only after the same name is
+entered again. Each restore moves the checkpoint to a new sid, so a link
+that was shared or bookmarked stops working once it has been used.
+
+A store is a map of sid -> {field: str}, the same shape as a Redis hash:
+
+    get(sid)                        HGETALL
+    put(sid, fields, replace=False) HSET (after DEL when replace=True)
+    delete(sid)                     DEL
+
+Checkpoints are compact and incremental. Starting a quiz writes its
+parameters and the ids of the sampled bank questions (not the questions);
+each answer then writes one "a<index>" field holding the chosen option's
+position, and submitting writes one flag. Nothing else is re-sent.
+
+STUDY_SESSION_STORE picks the backend:
+    sqlite:///path/to/sessions.sqlite3   (default: under STUDY_DATA_DIR)
+    redis://host:6379/0                  (needs the redis package)
+    memory://                            (this process only)
+Sessions untouched for STUDY_SESSION_TTL_DAYS (default 7) are dropped.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+import profiling
+
+DATA_DIR = os.environ.get("STUDY_DATA_DIR", ".study_data")
+DEFAULT_URL = "sqlite:///" + os.path.join(DATA_DIR, "sessions.sqlite3")
+SESSION_TTL = float(os.environ.get("STUDY_SESSION_TTL_DAYS", "7")) * 24 * 60 * 60
+
+
+class SessionStore(ABC):
+    """Interface of a session backend; values are strings."""
+
+    @abstractmethod
+    def get(self, sid):
+        """All fields of the session, or {} if there is none."""
+
+    @abstractmethod
+    def put(self, sid, fields, replace=False):
+        """Set `fields`; with replace=True the session's other fields are dropped."""
+
+    @abstractmethod
+    def delete(self, sid):
+        """Drop the session and all its fields."""
+
+    def purge(self, max_age=SESSION_TTL):
+        """Drop sessions idle for longer than `max_age` seconds (if the backend needs it)."""
+
+
+class MemorySessionStore(SessionStore):
+    """Dict-backed store; a stand-in for Redis in one process."""
+
+    def __init__(self):
+        self._sessions = {}   # sid -> (fields, last update)
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            return dict(entry[0]) if entry else {}
+
+    def put(self, sid, fields, replace=False):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            current = {} if replace or entry is None else entry[0]
+            current.update(fields)
+            self._sessions[sid] = (current, time.time())
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def purge(self, max_age=SESSION_TTL):
+        cutoff = time.time() - max_age
+        with self._lock:
+            for sid in [sid for sid, (_, updated) in self._sessions.items() if updated < cutoff]:
+                del self._sessions[sid]
+
+
+class SQLiteSessionStore(SessionStore):
+    """One row per (sid, field) in a WAL-mode SQLite file.
+
+    An answer is a single-row upsert. Replicas on one host (or sharing a
+    local volume) can use the same file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_fields ("
+                " sid TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, updated REAL NOT NULL,"
+                " PRIMARY KEY (sid, field)) WITHOUT ROWID"
+            )
+
+    def _conn(self):
+        # sqlite3 connections must stay on their thread; Streamlit runs each session in its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: a commit is durable across app crashes and costs no fsync
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        rows = self._conn().execute("SELECT field, value FROM session_fields WHERE sid = ?", (sid,))
+        return dict(rows.fetchall())
+
+    def put(self, sid, fields, replace=False):
+        now = time.time()
+        with self._conn() as conn:
+            if replace:
+                conn.execute("DELETE FROM session_fields WHERE sid = ?", (sid,))
+            conn.executemany(
+                "INSERT INTO session_fields (sid, field, value, updated) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (sid, field) DO UPDATE SET value = excluded.value, updated = excluded.updated",
+                [(sid, field, value, now) for field, value in fields.items()],
+            )
+
+    def delete(self, sid):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM session_fields WHERE sid = ?", (sid,))
+
+    def purge(self, max_age=SESSION_TTL):
+        cutoff = time.time() - max_age
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM session_fields WHERE sid IN"
+                " (SELECT sid FROM session_fields GROUP BY sid HAVING MAX(updated) < ?)",
+                (cutoff,),
+            )
+
+
+class RedisSessionStore(SessionStore):
+    """A Redis hash per session, expiring after SESSION_TTL of inactivity."""
+
+    def __init__(self, url, prefix="study:session:"):
+        if redis is None:
+            raise RuntimeError("The redis package is required for a redis:// session store.")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def get(self, sid):
+        return self.client.hgetall(self.prefix + sid)
+
+    def put(self, sid, fields, replace=False):
+        key = self.prefix + sid
+        pipe = self.client.pipeline()
+        if replace:
+            pipe.delete(key)
+        if fields:
+            pipe.hset(key, mapping=fields)
+        pipe.expire(key, int(SESSION_TTL))
+        pipe.execute()
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+def open_store(url=None):
+    """Open the backend named by `url` (default: STUDY_SESSION_STORE)."""
+    url = url or os.environ.get("STUDY_SESSION_STORE") or DEFAULT_URL
+    if url.startswith("sqlite:///"):
+        store = SQLiteSessionStore(url[len("sqlite:///"):])
+    elif url.startswith(("redis://", "rediss://", "unix://")):
+        store = RedisSessionStore(url)
+    elif url == "memory://":
+        store = MemorySessionStore()
+    else:
+        raise ValueError(f"Unknown session store URL: {url}")
+    store.purge()
+    return store
+
+
+class QuizCheckpoint:
+    """Incremental checkpoints of one session's quiz in a SessionStore.
+
+    Fields: "quiz" = {"params", "ids", "due"} as JSON, "a<i>" = chosen
+    option position for question i, "submitted" = "1" once submitted.
+    """
+
+    def __init__(self, store, sid):
+        self.store = store
+        self.sid = sid
+
+    def start(self, params, questions, due=0, extra=None):
+        """Replace any earlier checkpoint with a freshly sampled quiz."""
+        quiz = {"params": params, "ids": [q["id"] for q in questions], "due": due, **(extra or {})}
+        with profiling.span("session.checkpoint", op="start"):
+            self.store.put(self.sid, {"quiz": json.dumps(quiz, ensure_ascii=False, separators=(",", ":"))}, replace=True)
+
+    def answer(self, index, option):
+        with profiling.span("session.checkpoint", op="answer"):
+            self.store.put(self.sid, {f"a{index}": str(option)})
+
+    def submit(self):
+        with profiling.span("session.checkpoint", op="submit"):
+            self.store.put(self.sid, {"submitted": "1"})
+
+    def clear(self):
+        with profiling.span("session.checkpoint", op="clear"):
+            self.store.delete(self.sid)
+
+    def move(self, sid):
+        """Re-key the checkpoint under `sid`; the old id stops restoring anything."""
+        with profiling.span("session.checkpoint", op="move"):
+            fields = self.store.get(self.sid)
+            if fields:
+                self.store.put(sid, fields, replace=True)
+            self.store.delete(self.sid)
+        self.sid = sid
+
+    def restore(self, questions_by_id):
+        """Return the saved quiz, or None if there is none (or the bank changed).
+
+        The result is {"params", "questions", "answers": {i: option or None},
+        "submitted", "due", ...} with answers as option positions.
+        """
+        with profiling.span("session.restore"):
+            fields = self.store.get(self.sid)
+        if "quiz" not in fields:
+            return None
+        try:
+            quiz = json.loads(fields["quiz"])
+            questions = [questions_by_id[qid] for qid in quiz.pop("ids")]
+            answers = {i: None for i in range(len(questions))}
+            for field, value in fields.items():
+                if field.startswith("a") and field[1:].isdigit() and int(field[1:]) in answers:
+                    option = int(value)
+                    if 0 <= option < len(questions[int(field[1:])]["options"]):
+                        answers[int(field[1:])] = option
+        except (ValueError, KeyError, TypeError):
+            return None
+        quiz.update(questions=questions, answers=answers, submitted=fields.get("submitted") == "1")
+        return quiz
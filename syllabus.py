@@ -0,0 +1,313 @@
+"""Syllabus processing: text extraction (with an OCR fallback for scanned
+pages), cleaning and question generation. Nothing here imports Streamlit, so
+the app and the batch CLI (batch.py) share the same pipeline.
+
+Pages that carry a text layer are read with PyPDF2 as before. Pages that come
+back (nearly) empty are rendered with pypdfium2 and OCR'd with Tesseract in a
+thread pool. OCR output is cached on disk per page content hash, so uploading
+the same scan again - or a mixed document where only a few pages are scans -
+only pays OCR cost for pages that were never seen before.
+
+pypdfium2 and pytesseract (plus the tesseract binary and the STUDY_OCR_LANG
+traineddata) are optional; without them scanned pages are reported as empty
+instead of failing the upload. A page whose OCR fails is reported as
+"ocr-error" and the rest of the document is kept.
+"""
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from PyPDF2 import PdfReader
+
+import profiling
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # optional dependency
+    pdfium = None
+
+try:
+    import pytesseract
+except ImportError:  # optional dependency
+    pytesseract = None
+
+logger = logging.getLogger("study.syllabus")
+
+OCR_CACHE_DIR = os.environ.get("STUDY_OCR_CACHE", os.path.join(".study_cache", "ocr"))
+OCR_LANG = os.environ.get("STUDY_OCR_LANG", "eng")
+OCR_DPI = 200
+OCR_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# Pages with fewer letters/digits than this are treated as having no text layer
+# (scanners often add a stray page number or watermark).
+MIN_TEXT_CHARS = 20
+
+
+class PageLimitExceeded(ValueError):
+    """Raised when a PDF has more pages than the caller allows."""
+
+
+@dataclass
+class PageText:
+    number: int          # 1-based page number
+    text: str
+    method: str          # "text", "ocr", "ocr-cache", "ocr-error" or "empty"
+    seconds: float       # time spent getting this page's text
+    digest: str = ""     # content hash, used as the OCR cache key
+
+
+_ocr_ready = None
+
+
+def ocr_available():
+    """True when the OCR dependencies, the tesseract binary and OCR_LANG are present."""
+    global _ocr_ready
+    if _ocr_ready is None:
+        _ocr_ready = False
+        if pdfium is not None and pytesseract is not None:
+            try:
+                pytesseract.get_tesseract_version()
+                installed = set(pytesseract.get_languages(config=""))
+                missing = [lang for lang in OCR_LANG.split("+") if lang not in installed]
+                if missing:
+                    logger.warning("OCR disabled: tesseract language(s) %s not installed", "+".join(missing))
+                else:
+                    _ocr_ready = True
+            except Exception:
+                _ocr_ready = False
+    return _ocr_ready
+
+
+def has_text_layer(text):
+    return sum(ch.isalnum() for ch in text or "") >= MIN_TEXT_CHARS
+
+
+def _stream_bytes(obj):
+    # Raw (still encoded) bytes hash fine and skip decoding JBIG2/CCITT scans.
+    data = getattr(obj, "_data", None)
+    if data is None:
+        try:
+            data = obj.get_data()
+        except Exception:
+            data = b""
+    return data if isinstance(data, bytes) else str(data).encode("utf-8")
+
+
+def page_digest(page):
+    """Hash of a page's content stream and the images it draws."""
+    h = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        h.update(_stream_bytes(contents))
+    resources = page.get("/Resources")
+    xobjects = resources.get_object().get("/XObject") if resources is not None else None
+    if xobjects is not None:
+        xobjects = xobjects.get_object()
+        for name in sorted(xobjects):
+            h.update(str(name).encode("utf-8"))
+            h.update(_stream_bytes(xobjects[name].get_object()))
+    return h.hexdigest()
+
+
+def _cache_path(digest):
+    return os.path.join(OCR_CACHE_DIR, f"{digest}-{OCR_LANG}-{OCR_DPI}.txt")
+
+
+def _read_cached_ocr(digest):
+    try:
+        with open(_cache_path(digest), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cached_ocr(digest, text):
+    # the cache is only an optimisation; a read-only or full disk must not fail the page
+    try:
+        os.makedirs(OCR_CACHE_DIR, exist_ok=True)
+        path = _cache_path(digest)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Could not write OCR cache for %s: %s", digest, e)
+
+
+def _ocr_image(image):
+    start = time.perf_counter()
+    text = pytesseract.image_to_string(image, lang=OCR_LANG)
+    return text, time.perf_counter() - start
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _ocr_pages(source, pages):
+    """OCR the given PageText entries in place."""
+    _rewind(source)
+    try:
+        document = pdfium.PdfDocument(source)
+    except Exception as e:
+        for entry in pages:
+            _ocr_failed(entry, e)
+        return
+    try:
+        # pdfium is not thread safe, so pages are rendered here one at a time
+        # while the tesseract calls (separate processes) run in the pool.
+        with ThreadPoolExecutor(max_workers=OCR_WORKERS) as pool:
+            pending = []
+            for entry in pages:
+                start = time.perf_counter()
+                try:
+                    with profiling.span("pdf.ocr_render", page=entry.number):
+                        bitmap = document[entry.number - 1].render(scale=OCR_DPI / 72, grayscale=True)
+                        image = bitmap.to_pil()
+                except Exception as e:
+                    _ocr_failed(entry, e)
+                    continue
+                finally:
+                    entry.seconds += time.perf_counter() - start
+                pending.append((entry, pool.submit(_ocr_image, image)))
+                # keep at most a couple of rendered pages waiting per worker
+                if len(pending) >= OCR_WORKERS * 2:
+                    _collect(*pending.pop(0))
+            for item in pending:
+                _collect(*item)
+    finally:
+        document.close()
+
+
+def _ocr_failed(entry, error):
+    entry.method = "ocr-error"
+    profiling.count("ocr.errors")
+    logger.warning("OCR failed on page %d: %s: %s", entry.number, type(error).__name__, error)
+
+
+def _collect(entry, future):
+    try:
+        text, seconds = future.result()
+    except Exception as e:  # e.g. TesseractError; keep the other pages
+        _ocr_failed(entry, e)
+        return
+    entry.text = text.strip()
+    entry.seconds += seconds
+    entry.method = "ocr" if has_text_layer(entry.text) else "empty"
+    profiling.count("ocr.pages")
+    if entry.digest:
+        _write_cached_ocr(entry.digest, entry.text)
+
+
+def extract_pdf_pages(source, ocr=True, max_pages=None):
+    """Return one PageText per page, OCR'ing pages without a text layer.
+
+    `source` is a file path or a binary file object. Paths are preferred:
+    PdfReader then reads the open file lazily and pdfium maps it directly.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return _extract_pdf_pages(f, source, ocr, max_pages)
+    return _extract_pdf_pages(source, source, ocr, max_pages)
+
+
+def _extract_pdf_pages(stream, source, ocr, max_pages):
+    with profiling.span("pdf.open"):
+        reader = PdfReader(stream)
+    if max_pages is not None and len(reader.pages) > max_pages:
+        raise PageLimitExceeded(f"PDF has {len(reader.pages)} pages; the limit is {max_pages}.")
+
+    pages = []
+    needs_ocr = []
+    use_ocr = ocr and ocr_available()
+    with profiling.span("pdf.pages", pages=len(reader.pages)):
+        for number, page in enumerate(reader.pages, 1):
+            start = time.perf_counter()
+            text = page.extract_text() or ""
+            entry = PageText(number, text, "text", 0.0)
+            if not has_text_layer(text):
+                entry.method = "empty"
+                if use_ocr:
+                    entry.digest = page_digest(page)
+                    cached = _read_cached_ocr(entry.digest)
+                    if cached is not None:
+                        profiling.count("ocr_cache.hit")
+                        entry.text = cached
+                        entry.method = "ocr-cache" if has_text_layer(cached) else "empty"
+                    else:
+                        profiling.count("ocr_cache.miss")
+                        needs_ocr.append(entry)
+            entry.seconds = time.perf_counter() - start
+            pages.append(entry)
+
+    if needs_ocr:
+        with profiling.span("pdf.ocr", pages=len(needs_ocr)):
+            _ocr_pages(source, needs_ocr)
+    return pages
+
+
+def clean_text(text):
+    text = re.sub(r'(?i)(lecture\s*notes?|prepared\s*by.|page\s\d+|contents?|index|chapter\s*\d+)', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def extract_sentences(text):
+    """Sentences of cleaned text long enough to build a question from."""
+    return [s.strip() for s in text.split(".") if len(s.strip()) > 30]
+
+
+def generate_questions_from_text(text, rng=random):
+    """Turn cleaned syllabus text into {"MCQ", "Very Short", "Short", "Long"} questions.
+
+    `rng` does the sentence shuffle; pass a seeded random.Random for repeatable output.
+    """
+    return questions_from_sentences(extract_sentences(text), rng)
+
+
+def questions_from_sentences(sentences, rng=random):
+    """Build the question set from a whole document's sentences (see generate_questions_from_text)."""
+    sentences = list(sentences)
+    rng.shuffle(sentences)
+
+    mcqs, very_short, short_qs, long_qs = [], [], [], []
+
+    # Predefined question patterns
+    patterns = [
+        "Write a detailed note on {}",
+        "Explain the difference between {} and {}",
+        "Explain the types of {}",
+        "Describe the architecture of {}",
+        "Explain the concept of {}"
+    ]
+
+    for i, s in enumerate(sentences[:20]):
+        concept = s.split()[0:5]  # take first few words as concept
+        concept_text = " ".join(concept)
+
+        # MCQs
+        if i < 5:
+            mcq_question = f"{patterns[i % len(patterns)].format(concept_text, concept_text)}"
+            options = [f"{concept_text} Option {x}" for x in "ABCD"]
+            answer = options[0]
+            mcqs.append((mcq_question, options, answer))
+
+        # Very Short
+        elif i < 10:
+            very_short.append(f"Define briefly: {concept_text}")
+
+        # Short
+        elif i < 15:
+            short_qs.append(f"Explain shortly: {patterns[i % len(patterns)].format(concept_text, concept_text)}")
+
+        # Long
+        else:
+            long_qs.append(f"{patterns[i % len(patterns)].format(concept_text, concept_text)}")
+
+    return {"MCQ": mcqs, "Very Short": very_short, "Short": short_qs, "Long": long_qs}
@@ -0,0 +1,295 @@
+"""One subject taxonomy for the planner, the quiz tab and the question generator.
+
+Each canonical subject has aliases ("maths" -> mathematics, "os" ->
+operating system) and sub-topics. Free text is resolved in three steps:
+
+1. exact lookup of the normalised text in a dict of names/aliases/topics;
+2. otherwise candidates sharing character trigrams with the input are counted
+   from a trigram -> names index and ranked by Dice similarity;
+3. the best ones are accepted if they are very similar or within a small,
+   bounded edit distance of the input.
+
+Everything is precomputed when subjects are added. A lookup is a dict hit,
+or a walk over the names sharing the input's less common trigrams, so it
+stays in the tens of microseconds with thousands of registered courses.
+Type-ahead completion uses a sorted name list (a flattened trie).
+More subjects can be loaded from a JSON file named by STUDY_TAXONOMY:
+{"subject": {"aliases": [...], "topics": [...], "display": "..."}, ...}
+"""
+import bisect
+import json
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+
+# canonical name -> aliases and sub-topics
+SUBJECTS = {
+    "mathematics": {
+        "aliases": ["maths", "math", "mathematic", "गणित"],
+        "topics": ["Algebra", "Linear Equations", "Quadratic Equations", "Functions", "Prime Numbers",
+                   "Mensuration", "Differentiation", "Integration", "Limits", "Matrices and Determinants",
+                   "Pythagorean Theorem", "Trigonometry", "Probability", "Statistics"],
+    },
+    "physics": {
+        "aliases": ["phy", "भौतिकी"],
+        "topics": ["Laws of Motion", "Gravitation", "Work and Energy", "Electricity", "Light", "Pressure",
+                   "Heat and Temperature", "Magnetism", "Modern Physics", "Units and Measurement", "Ohm's Law"],
+    },
+    "chemistry": {
+        "aliases": ["chem", "रसायन"],
+        "topics": ["Atomic Structure", "Periodic Table", "Chemical Bonding", "Chemical Reactions",
+                   "Acids, Bases and pH", "Mole Concept", "Chemical Formulae", "Organic Chemistry"],
+    },
+    "biology": {
+        "aliases": ["bio", "life science", "जीव विज्ञान"],
+        "topics": ["Cell Biology", "Photosynthesis", "Genetics", "Digestion", "Blood and Circulation",
+                   "Endocrine System", "Homeostasis", "Biomolecules", "Evolution"],
+    },
+    "science": {
+        "aliases": ["general science", "evs", "विज्ञान"],
+        "topics": [],
+    },
+    "english": {
+        "aliases": ["eng", "english language", "english grammar"],
+        "topics": ["Parts of Speech", "Tenses", "Articles", "Prepositions", "Active and Passive Voice",
+                   "Vocabulary", "Homophones", "Subject-Verb Agreement"],
+    },
+    "hindi": {
+        "aliases": ["हिंदी", "हिन्दी"],
+        "topics": ["संज्ञा", "विशेषण", "पर्यायवाची शब्द", "विलोम शब्द", "अलंकार", "रस", "कबीर"],
+    },
+    "sociology": {"aliases": ["socio"], "topics": ["Introduction to Sociology"]},
+    "history": {"aliases": ["hist", "इतिहास"], "topics": ["Mughal Empire", "Indian National Movement"]},
+    "geography": {"aliases": ["geo", "भूगोल"], "topics": ["Continents", "Climate", "Maps"]},
+    "accountancy": {"aliases": ["accounts", "accounting"], "topics": ["Accounting Equation", "Journal Entries"]},
+    "economics": {
+        "aliases": ["eco", "econ", "अर्थशास्त्र"],
+        "topics": ["Demand", "Inflation", "Scarcity", "Opportunity Cost", "National Income",
+                   "Monetary Policy", "Money and Interest", "Production Possibilities", "Income Inequality"],
+    },
+    "business studies": {"aliases": ["business", "bst"], "topics": ["Nature of Business", "Management"]},
+    "computer science": {
+        "aliases": ["computer", "computers", "cs", "comp sci", "computer applications"],
+        "topics": ["Computer Hardware", "Memory", "Data Structures", "Algorithms", "Sorting Algorithms",
+                   "Recursion", "Databases", "Network Security", "Networking Protocols", "Programming Paradigms"],
+    },
+    "python": {
+        "aliases": ["python programming", "py"],
+        "topics": ["Data Types", "Lists", "Loops", "Functions", "Modules", "List Comprehensions",
+                   "Classes and Objects"],
+    },
+    "java": {"aliases": ["java programming", "core java"], "topics": ["Classes and Objects", "Polymorphism"]},
+    "c": {"aliases": ["c programming", "c language"], "topics": ["Pointers", "Storage Classes", "Header Files"]},
+    "c++": {"aliases": ["cpp", "c plus plus"], "topics": ["Inheritance", "Access Specifiers", "Operators"]},
+    "operating system": {
+        "aliases": ["os", "operating systems"],
+        "topics": ["Kernel", "CPU Scheduling", "Memory Management", "Types of Operating Systems"],
+    },
+    "dbms": {
+        "display": "DBMS",
+        "aliases": ["database management system", "database management systems", "databases", "sql"],
+        "topics": ["Normalization", "Transactions", "Relational Model"],
+    },
+}
+
+# one non-word character; combining marks are kept (\w misses Devanagari vowel signs)
+_NOISE_RE = re.compile(r"[^\w+#]")
+# inputs this short are too ambiguous for fuzzy matching ("c" vs "cs")
+MIN_FUZZY_LENGTH = 4
+MIN_SIMILARITY = 0.45
+STRONG_SIMILARITY = 0.7
+FUZZY_CANDIDATES = 5
+COMMON_GRAM_MIN = 64
+COMMON_GRAM_FRACTION = 20
+
+
+def _noise(match):
+    char = match.group()
+    return char if unicodedata.category(char)[0] == "M" else " "
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    return " ".join(_NOISE_RE.sub(_noise, text).split())
+
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, limit):
+    """Damerau-Levenshtein distance, or limit + 1 once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if prev2 is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+@dataclass
+class Resolution:
+    subject: str         # canonical subject
+    matched: str         # the name/alias/topic that matched
+    topic: str = None    # set when the input named a sub-topic
+    exact: bool = True
+    score: float = 1.0
+
+
+class Taxonomy:
+    def __init__(self, subjects=None):
+        self.subjects = {}
+        self._exact = {}        # normalised name -> (subject, topic or None, display form)
+        self._names = []        # name id -> normalised name
+        self._name_grams = []   # name id -> frozenset of its trigrams
+        self._grams = {}        # trigram -> [name ids]
+        self._sorted = []       # sorted normalised names, for prefix completion
+        self._display = {}
+        self.update(subjects or {})
+
+    def update(self, subjects):
+        """Add a {name: {"aliases", "topics", "display"}} mapping.
+
+        Names and aliases are registered before topics, so an alias always
+        wins over a sub-topic of another subject with the same text.
+        """
+        for name, info in subjects.items():
+            subject = self.add_subject(name, info.get("aliases", ()))
+            if info.get("display"):
+                self._display[subject] = info["display"]
+        for name, info in subjects.items():
+            self.add_subject(name, topics=info.get("topics", ()))
+
+    def _register(self, name, subject, topic=None, display=None):
+        key = normalize(name)
+        if not key or key in self._exact:
+            return
+        self._exact[key] = (subject, topic, display or name)
+        name_id = len(self._names)
+        self._names.append(key)
+        grams = _trigrams(key)
+        self._name_grams.append(frozenset(grams))
+        for gram in grams:
+            self._grams.setdefault(gram, []).append(name_id)
+        bisect.insort(self._sorted, key)
+
+    def add_subject(self, name, aliases=(), topics=()):
+        """Add (or extend) a canonical subject with its aliases and sub-topics."""
+        subject = normalize(name)
+        info = self.subjects.setdefault(subject, {"aliases": [], "topics": []})
+        self._register(subject, subject)
+        for alias in aliases:
+            if alias not in info["aliases"]:
+                info["aliases"].append(alias)
+            self._register(alias, subject)
+        for topic in topics:
+            if topic not in info["topics"]:
+                info["topics"].append(topic)
+            self._register(topic, subject, topic=topic)
+        return subject
+
+    def load_json(self, path):
+        with open(path, encoding="utf-8") as f:
+            self.update(json.load(f))
+
+    def names(self):
+        """Canonical subject names, sorted."""
+        return sorted(self.subjects)
+
+    def display_name(self, subject):
+        subject = normalize(subject)
+        return self._display.get(subject) or (subject.title() if subject.isascii() else subject)
+
+    def topics(self, subject):
+        return list(self.subjects.get(normalize(subject), {}).get("topics", []))
+
+    def canonical(self, text):
+        """Canonical subject for `text`, or None."""
+        found = self.resolve(text)
+        return found.subject if found else None
+
+    def resolve(self, text):
+        """Resolve free text to a Resolution, or None if nothing is close enough."""
+        key = normalize(text)
+        if not key:
+            return None
+        hit = self._exact.get(key)
+        if hit is not None:
+            return Resolution(hit[0], hit[2], topic=hit[1])
+        matches = self.suggest(key, FUZZY_CANDIDATES) if len(key) >= MIN_FUZZY_LENGTH else []
+        if not matches:
+            return None
+        limit = max(1, len(key) // 4)
+        for score, name in matches:
+            # close enough on trigrams alone, or only a typo or two away
+            if score >= STRONG_SIMILARITY or _edit_distance(key, name, limit) <= limit:
+                subject, topic, display = self._exact[name]
+                return Resolution(subject, display, topic=topic, exact=False, score=score)
+        return None
+
+    def find_in(self, text):
+        """Resolve a longer label such as "Physics_Syllabus_2024" or a course title.
+
+        Tries the whole text first, then any run of up to three words that is
+        a known name (single letters are skipped, "c" is too easy to hit).
+        """
+        found = self.resolve(text)
+        if found:
+            return found
+        words = normalize(text.replace("_", " ")).split()
+        for size in (3, 2, 1):
+            for i in range(len(words) - size + 1):
+                phrase = " ".join(words[i:i + size])
+                hit = self._exact.get(phrase) if len(phrase) > 1 else None
+                if hit is not None:
+                    return Resolution(hit[0], hit[2], topic=hit[1])
+        return None
+
+    def suggest(self, text, limit=3):
+        """[(similarity, normalised name)] of the closest known names."""
+        key = normalize(text)
+        grams = _trigrams(key)
+        postings = [self._grams[g] for g in grams if g in self._grams]
+        # Trigrams shared by many names ("cou", "our" in thousands of
+        # "... course" names) only pick candidates when nothing rarer matches.
+        common_cap = max(COMMON_GRAM_MIN, len(self._names) // COMMON_GRAM_FRACTION)
+        rare = [ids for ids in postings if len(ids) <= common_cap]
+        candidates = set()
+        for ids in rare or postings:
+            candidates.update(ids)
+        scored = []
+        for name_id in candidates:
+            name_grams = self._name_grams[name_id]
+            dice = 2 * len(grams & name_grams) / (len(grams) + len(name_grams))
+            if dice >= MIN_SIMILARITY:
+                scored.append((dice, self._names[name_id]))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored[:limit]
+
+    def complete(self, prefix, limit=10):
+        """Known names starting with `prefix` (for type-ahead)."""
+        key = normalize(prefix)
+        start = bisect.bisect_left(self._sorted, key)
+        found = []
+        for name in self._sorted[start:]:
+            if not name.startswith(key) or len(found) >= limit:
+                break
+            found.append(name)
+        return found
+
+
+def default_taxonomy():
+    taxonomy = Taxonomy(SUBJECTS)
+    extra = os.environ.get("STUDY_TAXONOMY")
+    if extra:
+        taxonomy.load_json(extra)
+    return taxonomy
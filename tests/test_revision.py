@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+import revision
+
+NOW = 1_000_000_000.0
+DAY = revision.DAY
+
+
+@pytest.fixture(autouse=True)
+def deck_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(revision, "DECK_DIR", str(tmp_path))
+    monkeypatch.setattr(revision, "_decks", {})
+    return tmp_path
+
+
+def test_sm2_intervals():
+    card = {"ease": revision.DEFAULT_EASE, "interval": 0, "reps": 0, "lapses": 0}
+    assert [revision.sm2(card, revision.QUALITY_CORRECT) for _ in range(3)] == [1, 6, 15]
+    assert revision.sm2(card, revision.QUALITY_WRONG) == 1
+    assert card["reps"] == 0 and card["lapses"] == 1
+
+
+def test_correct_answer_without_a_card_is_ignored():
+    deck = revision.RevisionDeck("asha")
+    assert deck.record("q1", True, "physics", "Light", now=NOW) is None
+    assert deck.cards == {}
+
+
+def test_due_is_most_overdue_first_and_respects_limit_and_subject():
+    deck = revision.RevisionDeck("asha")
+    deck.record("p1", False, "physics", "Light", now=NOW)
+    deck.record("m1", False, "mathematics", "Algebra", now=NOW - DAY)
+    deck.record("p2", False, "physics", "Heat", now=NOW - 2 * DAY)
+    assert deck.due(now=NOW - 1) == ["p2"]
+    assert deck.due(now=NOW) == ["p2", "m1"]
+    assert deck.due(now=NOW + DAY) == ["p2", "m1", "p1"]
+    assert deck.due(now=NOW + DAY, limit=2) == ["p2", "m1"]
+    assert deck.due(now=NOW + DAY, subject="physics") == ["p2", "p1"]
+    assert deck.due(now=NOW + DAY, subject="hindi") == []
+
+
+def test_rescheduled_card_is_listed_once_at_its_new_time():
+    deck = revision.RevisionDeck("asha")
+    deck.record("p1", False, "physics", "Light", now=NOW)
+    deck.record("p1", True, "physics", "Light", now=NOW + DAY)
+    assert deck.due(now=NOW + DAY) == []
+    assert deck.due(now=NOW + 3 * DAY) == ["p1"]
+
+
+def test_merge_keeps_the_more_reviewed_copy():
+    deck = revision.RevisionDeck("asha")
+    deck.record("p1", False, "physics", "Light", now=NOW)
+    deck.record("p2", False, "physics", "Heat", now=NOW)
+    other = revision.RevisionDeck("asha")
+    other.record("p1", False, "physics", "Light", now=NOW)
+    other.record("p1", True, "physics", "Light", now=NOW + DAY)
+    other.record("p3", False, "physics", "Pressure", now=NOW)
+    stale = revision.RevisionDeck("asha")
+    stale.record("p2", False, "physics", "Heat", now=NOW - DAY)
+
+    deck.merge(other.cards)
+    deck.merge(stale.cards)
+    assert deck.cards["p1"]["v"] == 2
+    assert deck.cards["p2"] == deck.cards["p2"] | {"v": 1, "due": NOW + DAY}
+    assert sorted(deck.cards) == ["p1", "p2", "p3"]
+    assert deck.due(now=NOW + DAY) == ["p2", "p3"]
+
+
+def test_names_differing_only_in_vowel_signs_get_separate_decks(deck_dir):
+    deck = revision.load_deck("सोमा")
+    deck.record("h1", False, "hindi", "संज्ञा", now=NOW)
+    revision.save_deck(deck)
+    assert revision.load_deck("सीमा").cards == {}
+    assert list(revision.load_deck(" सोमा ").cards) == ["h1"]
+    assert len([f for f in os.listdir(deck_dir) if f.endswith(".json")]) == 1
+
+
+def test_save_merges_changes_from_another_process(monkeypatch):
+    mine = revision.load_deck("Asha")
+    mine.record("p1", False, "physics", "Light", now=NOW)
+    revision.save_deck(mine)
+
+    # another process: its own cache, same file
+    monkeypatch.setattr(revision, "_decks", {})
+    theirs = revision.load_deck("asha")
+    theirs.record("p2", False, "physics", "Heat", now=NOW)
+    revision.save_deck(theirs)
+
+    mine.record("p3", False, "physics", "Pressure", now=NOW)
+    revision.save_deck(mine)
+    monkeypatch.setattr(revision, "_decks", {})
+    assert sorted(revision.load_deck("Asha").cards) == ["p1", "p2", "p3"]
+
+
+def test_load_deck_picks_up_a_newer_file(monkeypatch):
+    cached = revision.load_deck("Asha")
+    monkeypatch.setattr(revision, "_decks", {})
+    other = revision.load_deck("Asha")
+    other.record("p1", False, "physics", "Light", now=NOW)
+    revision.save_deck(other)
+    monkeypatch.setattr(revision, "_decks", {"asha": cached})
+    assert revision.load_deck("Asha") is cached
+    assert list(cached.cards) == ["p1"]
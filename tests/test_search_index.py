@@ -0,0 +1,152 @@
+import random
+
+import pytest
+
+import search_index
+
+WORDS = ("force motion energy light heat pressure current voltage atom bond acid cell gene "
+         "noun verb tense ratio angle prime matrix limit sorting kernel memory network").split()
+QUERIES = ["energy", "light heat", "atom bond acid", "kernel", "voltage current resistance", "zzz"]
+
+
+def question(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 10))) + "?"
+
+
+def results(index, query, **filters):
+    return sorted((round(score, 4), doc[0]) for score, doc in index.search(query, limit=10_000, **filters))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "search_index.pkl")
+
+
+@pytest.fixture
+def churned():
+    """600 live questions, half of them replaced once (so compaction is due)."""
+    rng = random.Random(0)
+    index = search_index.SearchIndex()
+    final = {}
+    for i in range(600):
+        final[f"q{i}"] = (question(rng), ["physics", "chemistry", "english"][i % 3])
+        index.add(f"q{i}", final[f"q{i}"][0], subject=final[f"q{i}"][1])
+    for i in range(0, 600, 2):
+        final[f"q{i}"] = (question(rng), final[f"q{i}"][1])
+        index.add(f"q{i}", final[f"q{i}"][0], subject=final[f"q{i}"][1])
+    return index, final
+
+
+def rebuilt(final):
+    index = search_index.SearchIndex()
+    for key, (text, subject) in final.items():
+        index.add(key, text, subject=subject)
+    return index
+
+
+def test_tokenize_keeps_devanagari_vowel_signs():
+    assert search_index.tokenize("संज्ञा क्या है? Ohm's LAW") == ["संज्ञा", "क्या", "है", "ohm", "s", "law"]
+
+
+def test_readding_unchanged_question_is_a_no_op():
+    index = search_index.SearchIndex()
+    assert index.add("q", "What is force?", subject="physics") is True
+    assert index.add("q", "What is force?", subject="physics") is False
+    assert index.add("q", "What is energy?", subject="physics") is True
+    assert len(index) == 1 and len(index.docs) == 2
+    assert results(index, "force") == []
+
+
+def test_compact_snapshot_and_load_match_a_rebuilt_index(churned, path):
+    index, final = churned
+    assert index.needs_compaction()
+    index.save(path)
+    if index._snapshot_thread:
+        index._snapshot_thread.join()
+    index.snapshot(path)
+    assert len(index.docs) == len(index) == 600
+
+    fresh = rebuilt(final)
+    loaded = search_index.SearchIndex.load(path)
+    for query in QUERIES:
+        expected = results(fresh, query)
+        assert results(index, query) == expected
+        assert results(loaded, query) == expected
+    assert results(loaded, "energy", subject="physics") == results(fresh, "energy", subject="physics")
+    assert loaded.subjects() == fresh.subjects() == ["chemistry", "english", "physics"]
+
+
+def test_load_replays_the_journal_over_the_snapshot(churned, path):
+    index, final = churned
+    index.snapshot(path)
+    index.add("extra", "Define kernel memory.", subject="computer science")
+    index.remove("q1")
+    index.save(path)
+    del final["q1"]
+    final["extra"] = ("Define kernel memory.", "computer science")
+
+    loaded = search_index.SearchIndex.load(path)
+    assert len(loaded) == len(final)
+    assert "q1" not in loaded.keys
+    assert results(loaded, "kernel memory") == results(index, "kernel memory")
+    assert "computer science" in loaded.subjects()
+
+
+def test_load_ignores_a_journal_line_cut_short(path):
+    index = search_index.SearchIndex()
+    index.add("q", "What is force?", subject="physics")
+    index.save(path)
+    with open(search_index._journal_path(path), "a", encoding="utf-8") as f:
+        f.write('["add", "half')
+    loaded = search_index.SearchIndex.load(path)
+    assert list(loaded.keys) == ["q"]
+
+
+def test_refresh_picks_up_other_processes(path):
+    first = search_index.SearchIndex.load(path)
+    second = search_index.SearchIndex.load(path)
+    first.add("a", "What is light?", subject="physics")
+    first.save(path)
+    second.add("b", "What is heat?", subject="physics")
+    second.save(path)            # appends after replaying first's op
+    assert second.refresh(path) is False
+    assert first.refresh(path) is True
+    for index in (first, second):
+        assert sorted(index.keys) == ["a", "b"]
+
+    first.snapshot(path)         # a new snapshot replaces the journal
+    second.add("c", "What is pressure?", subject="physics")
+    second.save(path)
+    assert first.refresh(path) is True
+    assert sorted(search_index.SearchIndex.load(path).keys) == sorted(first.keys) == ["a", "b", "c"]
+
+
+def test_subjects_only_lists_live_questions():
+    index = search_index.SearchIndex()
+    index.add("q1", "What is force?", subject="physics")
+    index.add("q2", "What is a noun?", subject="english")
+    index.remove("q2")
+    assert index.subjects() == ["physics"]
+
+
+def test_generated_questions_are_keyed_by_source():
+    index = search_index.SearchIndex()
+    same = {"Short": ["Explain Newton's first law."]}
+    search_index.add_generated(index, same, "physics", "fileA.pdf")
+    search_index.add_generated(index, same, "physics", "fileB.pdf")
+    assert len(index) == 2
+    search_index.add_generated(index, {"Short": []}, "physics", "fileA.pdf", replace=True)
+    assert [doc[7] for _, doc in index.search("newton")] == ["fileB.pdf"]
+
+
+def test_add_bank_removes_questions_dropped_from_the_bank():
+    bank = {"physics": {"Easy": [{"id": "physics/Easy/1", "q": "Unit of force?", "options": ["Newton", "Joule"],
+                                  "ans": "Newton"},
+                                 {"id": "physics/Easy/2", "q": "Unit of energy?", "options": ["Newton", "Joule"],
+                                  "ans": "Joule"}]}}
+    index = search_index.SearchIndex()
+    assert search_index.add_bank(index, bank) == 2
+    assert search_index.add_bank(index, bank) == 0
+    bank["physics"]["Easy"].pop()
+    assert search_index.add_bank(index, bank) == 1
+    assert list(index.keys) == ["physics/Easy/1"]
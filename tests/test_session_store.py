@@ -0,0 +1,115 @@
+import time
+
+import pytest
+
+import session_store
+
+BANK = {
+    f"physics/Easy/{i}": {"id": f"physics/Easy/{i}", "q": f"Question {i}?",
+                          "options": ["A", "B", "C", "D"], "ans": "A", "topic": "Light"}
+    for i in range(6)
+}
+PARAMS = {"subject": "physics", "difficulty": "Easy", "num": 3}
+SID = "0123456789abcdef0123456789abcdef"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return session_store.open_store("memory://")
+    return session_store.open_store(f"sqlite:///{tmp_path / 'sessions.sqlite3'}")
+
+
+def quiz():
+    return [BANK["physics/Easy/4"], BANK["physics/Easy/0"], BANK["physics/Easy/2"]]
+
+
+def test_checkpoint_round_trip(store):
+    checkpoint = session_store.QuizCheckpoint(store, SID)
+    checkpoint.start(PARAMS, quiz(), due=1, extra={"student": "Asha"})
+    checkpoint.answer(0, 2)
+    checkpoint.answer(2, 1)
+    checkpoint.answer(2, 3)
+
+    restored = session_store.QuizCheckpoint(store, SID).restore(BANK)
+    assert restored == {"params": PARAMS, "questions": quiz(), "answers": {0: 2, 1: None, 2: 3},
+                        "submitted": False, "due": 1, "student": "Asha"}
+    checkpoint.submit()
+    assert checkpoint.restore(BANK)["submitted"] is True
+
+
+def test_starting_again_replaces_the_old_quiz(store):
+    checkpoint = session_store.QuizCheckpoint(store, SID)
+    checkpoint.start(PARAMS, quiz())
+    checkpoint.answer(1, 1)
+    checkpoint.submit()
+    checkpoint.start(PARAMS, quiz()[:2])
+    restored = checkpoint.restore(BANK)
+    assert restored["answers"] == {0: None, 1: None} and restored["submitted"] is False
+
+
+def test_restore_without_a_usable_checkpoint(store):
+    checkpoint = session_store.QuizCheckpoint(store, SID)
+    assert checkpoint.restore(BANK) is None                 # unknown sid
+    checkpoint.answer(0, 1)
+    assert checkpoint.restore(BANK) is None                 # answers but no quiz
+    checkpoint.start(PARAMS, quiz())
+    assert checkpoint.restore({}) is None                   # bank changed since
+    store.put(SID, {"quiz": "{not json"})
+    assert checkpoint.restore(BANK) is None
+    checkpoint.clear()
+    assert store.get(SID) == {}
+
+
+def test_out_of_range_answers_are_dropped(store):
+    checkpoint = session_store.QuizCheckpoint(store, SID)
+    checkpoint.start(PARAMS, quiz())
+    store.put(SID, {"a0": "9", "a1": "x", "a7": "1", "a2": "0"})
+    assert checkpoint.restore(BANK) is None                 # "x" is not a position
+    store.put(SID, {"a1": "1"})
+    assert checkpoint.restore(BANK)["answers"] == {0: None, 1: 1, 2: 0}
+
+
+def test_move_retires_the_old_sid(store):
+    checkpoint = session_store.QuizCheckpoint(store, SID)
+    checkpoint.start(PARAMS, quiz(), extra={"student": "Asha"})
+    checkpoint.answer(1, 3)
+    checkpoint.move("f" * 32)
+    assert checkpoint.sid == "f" * 32
+    assert session_store.QuizCheckpoint(store, SID).restore(BANK) is None
+    assert checkpoint.restore(BANK)["answers"] == {0: None, 1: 3, 2: None}
+
+
+def test_sessions_are_independent(store):
+    session_store.QuizCheckpoint(store, "a" * 32).start(PARAMS, quiz())
+    session_store.QuizCheckpoint(store, "b" * 32).answer(0, 1)
+    assert store.get("a" * 32).keys() == {"quiz"}
+    assert store.get("b" * 32) == {"a0": "1"}
+
+
+def test_purge_drops_idle_sessions(store, monkeypatch):
+    store.put("old", {"quiz": "{}"})
+    monkeypatch.setattr(time, "time", lambda real=time.time: real() + 3600)
+    store.put("new", {"quiz": "{}"})
+    store.purge(max_age=60)
+    assert store.get("old") == {} and store.get("new") == {"quiz": "{}"}
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    url = f"sqlite:///{tmp_path / 'sessions.sqlite3'}"
+    session_store.QuizCheckpoint(session_store.open_store(url), SID).start(PARAMS, quiz())
+    assert session_store.QuizCheckpoint(session_store.open_store(url), SID).restore(BANK)["questions"] == quiz()
+
+
+def test_backends_must_implement_the_interface():
+    class Partial(session_store.SessionStore):
+        def get(self, sid):
+            return {}
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_unknown_store_url():
+    with pytest.raises(ValueError):
+        session_store.open_store("ftp://example")
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import taxonomy
+
+
+@pytest.fixture(scope="module")
+def tax():
+    return taxonomy.Taxonomy(taxonomy.SUBJECTS)
+
+
+@pytest.mark.parametrize("text, subject", [
+    ("Physics", "physics"), ("  PHYSICS ", "physics"), ("maths", "mathematics"), ("os", "operating system"),
+    ("cpp", "c++"), ("C", "c"), ("c#", None), ("गणित", "mathematics"), ("sql", "dbms"),
+])
+def test_exact_names_and_aliases(tax, text, subject):
+    assert tax.canonical(text) == subject
+
+
+@pytest.mark.parametrize("text, subject", [
+    ("Phisics", "physics"), ("mathematcs", "mathematics"), ("chemestry", "chemistry"),
+    ("operating sytem", "operating system"), ("biolgy", "biology"),
+])
+def test_typos_resolve_fuzzily(tax, text, subject):
+    found = tax.resolve(text)
+    assert found.subject == subject and not found.exact
+
+
+@pytest.mark.parametrize("text", ["xyzzy", "", "   ", "qwertyuiop", "cs1", "zz"])
+def test_unknown_text_does_not_resolve(tax, text):
+    assert tax.resolve(text) is None
+
+
+def test_topics_resolve_to_their_subject(tax):
+    found = tax.resolve("ohm's law")
+    assert (found.subject, found.topic, found.matched) == ("physics", "Ohm's Law", "Ohm's Law")
+    assert tax.resolve("Photosynthesis").subject == "biology"
+
+
+def test_alias_wins_over_topic_with_the_same_name(tax):
+    # "databases" is a dbms alias and a computer science topic
+    assert tax.resolve("databases").topic is None
+    assert tax.canonical("databases") == "dbms"
+
+
+@pytest.mark.parametrize("label, subject", [
+    ("Physics_Syllabus_2024", "physics"), ("Class 10 Maths notes", "mathematics"),
+    ("Intro to Operating Systems (2023)", "operating system"), ("Unit C Review", None),
+])
+def test_find_in_longer_labels(tax, label, subject):
+    found = tax.find_in(label)
+    assert (found.subject if found else None) == subject
+
+
+def test_complete_and_display_name(tax):
+    assert tax.complete("chem") == ["chem", "chemical bonding", "chemical formulae", "chemical reactions",
+                                    "chemistry"]
+    assert tax.display_name("dbms") == "DBMS"
+    assert tax.display_name("computer science") == "Computer Science"
+    assert tax.display_name("गणित") == "गणित"
+
+
+def test_extra_subjects_from_json(tmp_path, monkeypatch):
+    extra = tmp_path / "taxonomy.json"
+    extra.write_text(json.dumps({"astronomy": {"aliases": ["astro"], "topics": ["Black Holes"]}}))
+    monkeypatch.setenv("STUDY_TAXONOMY", str(extra))
+    tax = taxonomy.default_taxonomy()
+    assert tax.canonical("astro") == "astronomy"
+    assert tax.resolve("black holes").topic == "Black Holes"
+    assert tax.canonical("astronmy") == "astronomy"
@@ -0,0 +1,97 @@
+import os
+import random
+
+import pytest
+
+import topic_index
+
+PAGE_1 = """Unit 1: Mechanics
+Newton's laws, friction, momentum
+Newton's first law states that a body stays at rest unless a net force acts on it.
+"""
+PAGE_2 = """Unit 2: Electricity
+Ohm's law, resistance, current
+Ohm's law states that the current through a conductor is proportional to the voltage.
+"""
+PAGE_3 = """Unit 3: Optics
+Reflection, refraction, lenses
+Refraction is the bending of light as it passes from one medium into another medium.
+"""
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(topic_index, "INDEX_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_first_upload_processes_every_page():
+    index, summary = topic_index.update_index("Physics", [PAGE_1, PAGE_2])
+    assert summary == {"pages": 2, "reused": 0, "processed": 2, "removed": 0, "skipped": False}
+    headings = [t["heading"] for t in topic_index.build_topics(index)]
+    assert headings == ["Mechanics", "Electricity"]
+
+
+def test_reupload_reuses_unchanged_pages_even_when_moved():
+    topic_index.update_index("Physics", [PAGE_1, PAGE_2])
+    index, summary = topic_index.update_index("Physics", [PAGE_3, PAGE_2, PAGE_1])
+    assert (summary["reused"], summary["processed"], summary["removed"]) == (2, 1, 0)
+    topics = topic_index.build_topics(index)
+    assert [(t["heading"], t["pages"]) for t in topics] == [
+        ("Optics", [[1, 1]]), ("Electricity", [[2, 2]]), ("Mechanics", [[3, 3]])]
+
+
+def test_reupload_drops_removed_pages():
+    topic_index.update_index("Physics", [PAGE_1, PAGE_2])
+    index, summary = topic_index.update_index("Physics", [PAGE_1])
+    assert (summary["reused"], summary["processed"], summary["removed"]) == (1, 0, 1)
+    assert len(index["pages"]) == 1
+
+
+def test_whitespace_only_edits_reuse_the_page():
+    topic_index.update_index("Physics", [PAGE_1])
+    _, summary = topic_index.update_index("Physics", ["  " + PAGE_1.replace("\n", "\n\n")])
+    assert summary["reused"] == 1 and summary["processed"] == 0
+
+
+@pytest.mark.parametrize("pages", [[], ["", "   "], ["\f", "- 1 -"]])
+def test_upload_without_text_is_skipped_and_keeps_the_index(pages):
+    stored, _ = topic_index.update_index("Physics", [PAGE_1, PAGE_2])
+    index, summary = topic_index.update_index("Physics", pages)
+    assert summary["skipped"] is True
+    assert index == stored
+    assert topic_index.load_index("Physics") == stored
+
+
+def test_pages_stored_without_sentences_are_processed_again():
+    index, _ = topic_index.update_index("Physics", [PAGE_1])
+    for page in index["pages"].values():
+        del page["sentences"]
+    topic_index.save_index(index)
+    index, summary = topic_index.update_index("Physics", [PAGE_1])
+    assert summary["processed"] == 1
+    assert all(page["sentences"] for page in index["pages"].values())
+
+
+def test_similar_course_names_get_separate_indexes(index_dir):
+    topic_index.update_index("C", [PAGE_1])
+    topic_index.update_index("C++", [PAGE_2])
+    topic_index.update_index("C#", [PAGE_3])
+    assert len(os.listdir(index_dir)) == 3
+    assert topic_index.build_topics(topic_index.load_index("C"))[0]["heading"] == "Mechanics"
+    assert topic_index.build_topics(topic_index.load_index("c++"))[0]["heading"] == "Electricity"
+
+
+def test_course_names_match_ignoring_case_and_spacing():
+    stored, _ = topic_index.update_index("Computer  Science", [PAGE_1])
+    assert topic_index.load_index(" computer science ")["pages"] == stored["pages"]
+
+
+def test_merged_questions_use_repeated_pages_once(monkeypatch):
+    index, _ = topic_index.update_index("Physics", [PAGE_1, PAGE_2, PAGE_1])
+    seen = []
+    monkeypatch.setattr(topic_index.syllabus, "questions_from_sentences",
+                        lambda sentences, rng: seen.extend(sentences) or {})
+    topic_index.merged_questions(index, random.Random(0))
+    first, second = (index["pages"][topic_index.page_hash(p)]["sentences"] for p in (PAGE_1, PAGE_2))
+    assert seen == first + second
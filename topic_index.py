@@ -0,0 +1,222 @@
+"""Per-course topic index built from uploaded syllabi.
+
+Every page is keyed by a hash of its (whitespace-normalised) text. The
+per-page work - finding headings/concepts and the sentences questions are
+built from - is stored per page hash, so when a teacher re-uploads an edited
+syllabus only new or changed pages are processed; unchanged pages are reused
+even if they moved. The section -> concept -> page-span view and the question
+set are rebuilt from the stored pages, which is cheap; building questions
+from the whole course keeps the same MCQ/Very Short/Short/Long mix as an
+upload without a course name.
+
+An upload with no readable text at all (a PDF that failed to parse, or a
+scan without OCR) is never merged: it would otherwise replace every stored
+page with nothing.
+
+Indexes live as JSON files under STUDY_DATA_DIR (default .study_data), named
+by a hash of the normalised course name ("C" and "C++" must not share a
+file); the course name itself is kept inside the JSON and checked on load.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import unicodedata
+
+import profiling
+import syllabus
+
+DATA_DIR = os.environ.get("STUDY_DATA_DIR", ".study_data")
+INDEX_DIR = os.path.join(DATA_DIR, "topic_index")
+
+# TXT uploads have no real pages; split them into pseudo-pages of this many lines.
+TXT_LINES_PER_PAGE = 50
+
+_HEADING_RE = re.compile(
+    r'^(?:(?:unit|chapter|module|section|part|topic|lecture|week)\s*[\divxlc]+\b[\s:.\-–]*'
+    r'|\d+(?:\.\d+)*[.)]?\s+)(?P<title>.+)$',
+    re.IGNORECASE,
+)
+_BULLET_RE = re.compile(r'^[\s\-–•·*▪●○◦>]+|^\(?[a-z0-9]{1,3}[.)]\s+', re.IGNORECASE)
+_CONCEPT_SPLIT_RE = re.compile(r'[,;•·|]|\s[-–]\s|:')
+
+
+def course_key(course):
+    """Normalised course name: NFC, case-folded, single spaces."""
+    return " ".join(unicodedata.normalize("NFC", course or "").casefold().split())
+
+
+def _index_path(course):
+    digest = hashlib.sha256(course_key(course).encode("utf-8")).hexdigest()[:24]
+    return os.path.join(INDEX_DIR, f"{digest}.json")
+
+
+def page_hash(text):
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def split_text_pages(text, lines_per_page=TXT_LINES_PER_PAGE):
+    """Split plain text into pages on form feeds, else every `lines_per_page` lines."""
+    if "\f" in text:
+        return [p for p in text.split("\f") if p.strip()]
+    lines = text.splitlines()
+    return ["\n".join(lines[i:i + lines_per_page]) for i in range(0, len(lines), lines_per_page)]
+
+
+def _heading(line):
+    match = _HEADING_RE.match(line)
+    if match:
+        title = match.group("title").strip(" :.-–")
+        if title and len(title.split()) <= 12:
+            return title
+    words = line.split()
+    if 1 <= len(words) <= 8 and line.endswith(":"):
+        return line.rstrip(":").strip()
+    letters = [ch for ch in line if ch.isalpha()]
+    if 2 <= len(words) <= 8 and letters and all(ch.isupper() for ch in letters if ch.isascii()) \
+            and any(ch.isascii() for ch in letters):
+        return line.title()
+    return None
+
+
+def _concepts(line):
+    found = []
+    for part in _CONCEPT_SPLIT_RE.split(line):
+        part = part.strip(" .()[]\"'")
+        words = part.split()
+        if 1 <= len(words) <= 6 and sum(ch.isalpha() for ch in part) >= 3:
+            found.append(part)
+    return found
+
+
+def parse_page(text):
+    """Return the sections found on one page.
+
+    Each section is {"heading": str or None, "concepts": [str]}; a None heading
+    means the text continues the section from the previous page.
+    """
+    sections = [{"heading": None, "concepts": []}]
+    for raw_line in (text or "").splitlines():
+        line = _BULLET_RE.sub("", raw_line).strip()
+        if not line:
+            continue
+        title = _heading(line)
+        if title:
+            sections.append({"heading": title, "concepts": []})
+            continue
+        seen = {c.casefold() for c in sections[-1]["concepts"]}
+        for concept in _concepts(line):
+            if concept.casefold() not in seen:
+                seen.add(concept.casefold())
+                sections[-1]["concepts"].append(concept)
+    if not sections[0]["concepts"]:
+        sections.pop(0)
+    return sections
+
+
+def load_index(course):
+    try:
+        with open(_index_path(course), encoding="utf-8") as f:
+            index = json.load(f)
+        if course_key(index.get("course")) == course_key(course):
+            return index
+    except (OSError, ValueError):
+        pass
+    return {"course": course, "order": [], "pages": {}}
+
+
+def save_index(index):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    path = _index_path(index["course"])
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def update_index(course, page_texts):
+    """Merge a (re-)uploaded syllabus into the course index.
+
+    `page_texts` is the raw text of each page in order. Returns (index, summary).
+
+    If no page has usable text the stored index is returned unchanged and
+    summary["skipped"] is True.
+    """
+    index = load_index(course)
+    old_pages = index["pages"]
+    new_pages, order = {}, []
+    summary = {"pages": len(page_texts), "reused": 0, "processed": 0, "removed": 0, "skipped": False}
+    if not any(syllabus.has_text_layer(text) for text in page_texts):
+        summary["skipped"] = True
+        return index, summary
+
+    with profiling.span("topic_index.update", pages=len(page_texts)):
+        for text in page_texts:
+            digest = page_hash(text)
+            order.append(digest)
+            if digest in new_pages:
+                continue
+            # pages stored before sentences were kept are processed again
+            if digest in old_pages and "sentences" in old_pages[digest]:
+                new_pages[digest] = old_pages[digest]
+                summary["reused"] += 1
+                profiling.count("topic_index.page_reused")
+                continue
+            new_pages[digest] = {
+                "sections": parse_page(text),
+                "sentences": syllabus.extract_sentences(syllabus.clean_text(text)),
+            }
+            summary["processed"] += 1
+            profiling.count("topic_index.page_processed")
+
+    summary["removed"] = sum(1 for digest in old_pages if digest not in new_pages)
+    index = {"course": course, "order": order, "pages": new_pages}
+    save_index(index)
+    return index, summary
+
+
+def _spans(numbers):
+    spans = []
+    for n in sorted(set(numbers)):
+        if spans and n == spans[-1][1] + 1:
+            spans[-1][1] = n
+        else:
+            spans.append([n, n])
+    return spans
+
+
+def build_topics(index):
+    """Assemble [{"heading", "pages", "concepts": {concept: page spans}}] in document order."""
+    topics, by_heading = [], {}
+    current = None
+    for number, digest in enumerate(index["order"], 1):
+        for section in index["pages"][digest]["sections"]:
+            heading = section["heading"]
+            if heading is not None or current is None:
+                heading = heading or "Introduction"
+                current = by_heading.get(heading.casefold())
+                if current is None:
+                    current = {"heading": heading, "pages": [], "concepts": {}}
+                    by_heading[heading.casefold()] = current
+                    topics.append(current)
+            current["pages"].append(number)
+            for concept in section["concepts"]:
+                current["concepts"].setdefault(concept, []).append(number)
+    for topic in topics:
+        topic["pages"] = _spans(topic["pages"])
+        topic["concepts"] = {c: _spans(pages) for c, pages in topic["concepts"].items()}
+    return topics
+
+
+def merged_questions(index, rng=random):
+    """The course's question set, built from the sentences of all its pages (repeated pages once)."""
+    sentences = []
+    for digest in dict.fromkeys(index["order"]):
+        sentences.extend(index["pages"][digest].get("sentences", []))
+    return syllabus.questions_from_sentences(sentences, rng)
+
+
+def format_spans(spans):
+    return ", ".join(f"p.{a}" if a == b else f"pp.{a}-{b}" for a, b in spans)
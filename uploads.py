@@ -0,0 +1,102 @@
+"""Upload handling for syllabus files.
+
+Uploads are size-checked up front, copied to a temp file one chunk at a time
+through a single reusable buffer, and parsers are handed the temp file path
+rather than another in-memory copy. Text files are decoded incrementally from
+a memory map, so the only full-size object we build is the decoded text.
+"""
+import codecs
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+
+import profiling
+import syllabus
+
+MAX_UPLOAD_MB = int(os.environ.get("STUDY_MAX_UPLOAD_MB", "50"))
+MAX_PDF_PAGES = int(os.environ.get("STUDY_MAX_PDF_PAGES", "500"))
+CHUNK_SIZE = 1 << 20  # 1 MiB
+
+
+class UploadRejected(ValueError):
+    """Raised when an upload breaks the size or page limits."""
+
+
+def _limit_bytes(max_mb):
+    return max_mb * 1024 * 1024
+
+
+@contextmanager
+def spooled_upload(uploaded_file, max_mb=MAX_UPLOAD_MB, chunk_size=CHUNK_SIZE):
+    """Copy an upload to a temp file and yield its path; the file is removed afterwards."""
+    max_bytes = _limit_bytes(max_mb)
+    size = getattr(uploaded_file, "size", None)
+    if size is not None and size > max_bytes:
+        raise UploadRejected(f"File is {size / 1048576:.1f} MB; the limit is {max_mb} MB.")
+
+    suffix = os.path.splitext(getattr(uploaded_file, "name", ""))[1]
+    fd, path = tempfile.mkstemp(prefix="study_upload_", suffix=suffix)
+    try:
+        with profiling.span("upload.spool", bytes=size), os.fdopen(fd, "wb") as out:
+            if hasattr(uploaded_file, "seek"):
+                uploaded_file.seek(0)
+            buffer = bytearray(chunk_size)
+            view = memoryview(buffer)
+            total = 0
+            while True:
+                n = uploaded_file.readinto(buffer)
+                if not n:
+                    break
+                total += n
+                if total > max_bytes:
+                    raise UploadRejected(f"File is larger than the {max_mb} MB limit.")
+                out.write(view[:n])
+        yield path
+    finally:
+        os.remove(path)
+
+
+def iter_text_chunks(path, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """Yield decoded text from `path` one chunk at a time.
+
+    The incremental decoder carries multi-byte characters split across chunk
+    boundaries over to the next chunk, so Hindi text survives intact.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            for offset in range(0, len(mm), chunk_size):
+                text = decoder.decode(view[offset:offset + chunk_size])
+                if text:
+                    yield text
+        finally:
+            view.release()
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def read_text_file(path, chunk_size=CHUNK_SIZE):
+    return "".join(iter_text_chunks(path, chunk_size))
+
+
+def read_upload(uploaded_file, max_mb=MAX_UPLOAD_MB, max_pages=MAX_PDF_PAGES):
+    """Return (raw text, per-page report) for a PDF or TXT upload.
+
+    Raises UploadRejected when the file breaks the size or page limits.
+    """
+    is_pdf = uploaded_file.name.lower().endswith(".pdf")
+    with spooled_upload(uploaded_file, max_mb) as path:
+        if not is_pdf:
+            with profiling.span("upload.read", kind="txt", bytes=os.path.getsize(path)):
+                return read_text_file(path), []
+        with profiling.span("upload.read", kind="pdf", bytes=os.path.getsize(path)):
+            try:
+                pages = syllabus.extract_pdf_pages(path, max_pages=max_pages)
+            except syllabus.PageLimitExceeded as e:
+                raise UploadRejected(str(e)) from e
+        return " ".join(p.text for p in pages if p.text), pages